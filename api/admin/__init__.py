@@ -1,8 +1,9 @@
 # Local Apps
-from .role_admin import RoleAdmin, UserRoleAdmin
+from .role_admin import RoleAdmin, UserRoleAdmin, UserRoleMaskAdmin
 
 __all__ = [
     'RoleAdmin',
     'UserRoleAdmin',
+    'UserRoleMaskAdmin',
 ]
 
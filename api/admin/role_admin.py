@@ -1,5 +1,7 @@
 # Django Built-in modules
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import Truncator
 
@@ -7,23 +9,36 @@ from django.utils.text import Truncator
 from unfold.admin import ModelAdmin
 
 # Local Apps
-from utils.admin import DateTimeAdminMixin
-from ..models import Role, UserRole
+from utils.admin import DateTimeAdminMixin, LargeTableAdminMixin
+from utils.roles import get_required_role_mask
+from ..models import Role, UserRole, UserRoleMask
+
+User = get_user_model()
 
 
 @admin.register(Role)
 class RoleAdmin(ModelAdmin):
-    list_display = ('name', 'code', 'display_truncate_description', 'is_active', 'jcreated',)
+    list_display = ('name', 'code', 'parent', 'display_truncate_description', 'is_active', 'jcreated',)
     fieldsets = (
-        (_('اطلاعات نقش'), {'fields': ('name', 'code', 'description', 'is_active',)}),
+        (_('اطلاعات نقش'), {'fields': ('name', 'code', 'parent', 'description', 'is_active',)}),
         *DateTimeAdminMixin.fieldsets,
     )
     list_filter = ('is_active',)
     list_editable = ('is_active',)
-    search_fields = ('name', 'code', 'description',)
+    list_select_related = ('parent',)
+    # Prefix search: served by the unique indexes instead of scanning every description
+    search_fields = ('^name', '^code',)
     readonly_fields = (*DateTimeAdminMixin.readonly_fields,)
     save_on_top = False
 
+    def save_model(self, request, obj, form, change):
+        """
+        An is_active change (form or list_editable) also (de)activates the user roles.
+        """
+        super().save_model(request, obj, form, change)
+        if change and 'is_active' in form.changed_data:
+            obj.set_active(obj.is_active)
+
     @admin.display(description=_('توضیحات'), empty_value='-')
     def display_truncate_description(self, obj):
         if obj.description:
@@ -36,19 +51,78 @@ class RoleAdmin(ModelAdmin):
 
 
 @admin.register(UserRole)
-class UserRoleAdmin(ModelAdmin):
-    list_display = ('user', 'role', 'is_active', 'jcreated',)
+class UserRoleAdmin(LargeTableAdminMixin, ModelAdmin):
+    list_display = ('user', 'role', 'is_active', 'suspended_by_role', 'jcreated',)
     fieldsets = (
-        (_('اطلاعات نقش کاربر'), {'fields': ('user', 'role', 'is_active',)}),
+        (_('اطلاعات نقش کاربر'), {'fields': ('user', 'role', 'is_active', 'suspended_by_role',)}),
         *DateTimeAdminMixin.fieldsets,
     )
-    list_filter = ('is_active', 'role',)
+    list_filter = ('is_active', 'suspended_by_role', 'role',)
     list_editable = ('is_active',)
-    search_fields = ('user__username', 'user__email', 'role__name', 'role__code',)
-    readonly_fields = (*DateTimeAdminMixin.readonly_fields,)
+    list_select_related = ('user', 'role',)
+    autocomplete_fields = ('user', 'role',)
+    search_fields = ('^user__username', '^user__email', '^role__name', '^role__code',)
+    readonly_fields = ('suspended_by_role', *DateTimeAdminMixin.readonly_fields,)
     save_on_top = False
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Prefix search resolved on the user table (prefix indexes, see migration 0007)
+        and the small role table first, then matched by id: no OR across joined tables.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        users = User.objects.filter(
+            Q(username__istartswith=search_term) | Q(email__istartswith=search_term)
+        ).values('id')
+        roles = Role.objects.filter(
+            Q(name__istartswith=search_term) | Q(code__istartswith=search_term)
+        ).values('id')
+        return queryset.filter(Q(user_id__in=users) | Q(role_id__in=roles)), False
+
     @admin.display(description=_('تاریخ ایجاد'), ordering='created')
     def jcreated(self, obj):
         return obj.created.strftime('%Y/%m/%d %H:%M') if obj.created else '-'
 
+
+
+class HoldsRoleListFilter(admin.SimpleListFilter):
+    """
+    Users effectively holding a role (inherited included): one bitwise predicate on the mask.
+    """
+    title = _('دارای نقش')
+    parameter_name = 'holds_role'
+
+    def lookups(self, request, model_admin):
+        return Role.objects.filter(is_active=True).order_by('name').values_list('code', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.with_any_role(get_required_role_mask((self.value(),)))
+        return queryset
+
+
+@admin.register(UserRoleMask)
+class UserRoleMaskAdmin(LargeTableAdminMixin, ModelAdmin):
+    list_display = ('user', 'display_mask', 'updated',)
+    fieldsets = (
+        (_('ماسک نقش‌های کاربر'), {'fields': ('user', 'mask',)}),
+        *DateTimeAdminMixin.fieldsets,
+    )
+    list_filter = (HoldsRoleListFilter,)
+    list_select_related = ('user',)
+    search_fields = ('^user__username', '^user__email',)
+    readonly_fields = ('user', 'mask', *DateTimeAdminMixin.readonly_fields,)
+    save_on_top = False
+
+    def has_add_permission(self, request):
+        # Written from the user roles only (see the rebuild_role_masks command)
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description=_('ماسک نقش‌ها'), ordering='mask')
+    def display_mask(self, obj):
+        return f'{obj.mask:b}'
@@ -7,3 +7,6 @@ class ApiConfig(AppConfig):
     name = 'api'
     verbose_name = 'API'
 
+    def ready(self):
+        # Local Apps
+        from . import signals  # noqa: F401
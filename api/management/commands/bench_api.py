@@ -0,0 +1,321 @@
+# Python Standard Library
+import json
+import random
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+
+# Local Apps
+from utils.benchmark import QueryTimer, summarize_latencies
+from utils.roles import invalidate_all_roles, sync_role_masks
+from utils.tokens import RevocableRefreshToken
+from ...models import Role, UserRole
+
+User = get_user_model()
+
+PASSWORDS = ('Bench-Api-Pass-1', 'Bench-Api-Pass-2')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every authentication and role management endpoint on a seeded dataset. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help='Seeded users.')
+        parser.add_argument('--roles', type=int, default=20, help='Seeded roles.')
+        parser.add_argument('--roles-per-user', type=int, default=3, help='Active roles per seeded user.')
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--endpoint', action='append', help='Only run endpoints whose name contains this.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='JSON results of a previous run to compare with.')
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='p95 increase (percent) reported as a regression when comparing.'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when the comparison finds a regression.'
+        )
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+
+        # Measure the endpoints themselves, not the authentication throttles.
+        # The audit writer thread cannot write into the rolled back transaction: audit is off.
+        with override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}},
+            AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False},
+        ):
+            with transaction.atomic():
+                results = self.run(options)
+                transaction.set_rollback(True)
+        # Cached role codes may refer to rolled back rows
+        invalidate_all_roles()
+
+        for name, summary in results['endpoints'].items():
+            self.stdout.write(
+                f"{name:<28} p50 {summary['p50_ms']:>9} ms  p95 {summary['p95_ms']:>9} ms  "
+                f"p99 {summary['p99_ms']:>9} ms  {summary['throughput_rps']:>9} req/s  "
+                f"{summary['queries']:>5} queries  {summary['sql_ms']:>8} ms SQL  {summary['errors']} errors"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if previous is not None:
+            regressions = self.compare(previous, results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} endpoint(s) regressed: {', '.join(regressions)}")
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        prefix = f'bench_{uuid.uuid4().hex[:8]}_'
+        dataset = self.seed(rng, prefix, options)
+        invalidate_all_roles()
+
+        results = {}
+        for name, method, expected, prepare in self.get_endpoints(dataset):
+            if options['endpoint'] and not any(part in name for part in options['endpoint']):
+                continue
+            results[name] = self.measure(method, expected, prepare, options['iterations'], options['warmup'])
+
+        return {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'commit': self.get_commit(),
+                'database': connection.vendor,
+                'users': options['users'],
+                'roles': options['roles'],
+                'roles_per_user': options['roles_per_user'],
+                'iterations': options['iterations'],
+            },
+            'endpoints': results,
+        }
+
+    def seed(self, rng, prefix, options):
+        """
+        Create the benchmark dataset. A single password hash is shared by all users.
+        """
+        password = make_password(PASSWORDS[0])
+        User.objects.bulk_create([
+            User(username=f'{prefix}{index}', email=f'{prefix}{index}@bench.local', password=password)
+            for index in range(options['users'])
+        ], batch_size=500)
+        users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+        if len(users) < 2:
+            raise CommandError('At least 2 users are needed.')
+
+        admin_role, _ = Role.objects.get_or_create(code='admin', defaults={'name': 'Admin'})
+        if not admin_role.is_active:
+            admin_role.set_active(True)
+        try:
+            bits = Role.get_free_bits(options['roles'])
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        Role.objects.bulk_create([
+            Role(name=f'{prefix}{index}', code=f'{prefix}{index}', bit=bit)
+            for index, bit in enumerate(bits)
+        ])
+        roles = list(Role.objects.filter(code__startswith=prefix).order_by('id'))
+
+        roles_per_user = min(options['roles_per_user'], len(roles))
+        UserRole.objects.bulk_create([
+            UserRole(user=user, role=role)
+            for user in users
+            for role in rng.sample(roles, roles_per_user)
+        ], batch_size=500)
+        # bulk_create does not send post_save
+        sync_role_masks(user_id__in=[user.pk for user in users])
+        admin = users[0]
+        UserRole.objects.create(user=admin, role=admin_role)
+
+        return {
+            'prefix': prefix,
+            'admin': admin,
+            'users': users,
+            'roles': roles,
+            'rng': rng,
+        }
+
+    def get_endpoints(self, dataset):
+        """
+        Return (name, method, expected status codes, prepare) for each benchmarked endpoint.
+        prepare(index) runs outside the measured time and returns (path, data, extra headers).
+        """
+        prefix, admin, users, roles, rng = (
+            dataset['prefix'], dataset['admin'], dataset['users'], dataset['roles'], dataset['rng']
+        )
+        admin_headers = self.auth_headers(admin)
+        password_user = users[1]
+        member_ids = [user.pk for user in users[2:102]] or [password_user.pk]
+
+        def fixed(path, data=None, headers=admin_headers):
+            return lambda index: (path, data, headers)
+
+        def register(index):
+            return '/api/auth/register/', {
+                'username': f'{prefix}reg_{index}',
+                'email': f'{prefix}reg_{index}@bench.local',
+                'password': PASSWORDS[0],
+                'password_confirm': PASSWORDS[0],
+            }, {}
+
+        def logout(index):
+            return '/api/auth/logout/', None, self.auth_headers(admin)
+
+        def password_change(index):
+            old, new = PASSWORDS[index % 2], PASSWORDS[(index + 1) % 2]
+            # Tokens carry a hash of the password, which the previous iteration changed
+            password_user.refresh_from_db(fields=['password'])
+            return '/api/auth/password/change/', {
+                'old_password': old,
+                'new_password': new,
+                'new_password_confirm': new,
+            }, self.auth_headers(password_user)
+
+        def token_refresh(index):
+            return '/api/auth/token/refresh/', {'refresh': str(RevocableRefreshToken.for_user(admin))}, {}
+
+        def token_verify(index):
+            return '/api/auth/token/verify/', {'token': str(RevocableRefreshToken.for_user(admin).access_token)}, {}
+
+        def role_create(index):
+            return '/api/roles/', {'name': f'{prefix}new_{index}', 'code': f'{prefix}new_{index}'}, admin_headers
+
+        def role_detail(index):
+            return f'/api/roles/{rng.choice(roles).pk}/', None, admin_headers
+
+        def role_update(index):
+            role = rng.choice(roles)
+            return f'/api/roles/{role.pk}/', {'description': f'updated {index}'}, admin_headers
+
+        def role_delete(index):
+            role = Role.objects.create(name=f'{prefix}del_{index}', code=f'{prefix}del_{index}')
+            return f'/api/roles/{role.pk}/', None, admin_headers
+
+        def user_roles(index):
+            return f'/api/users/{rng.choice(users).pk}/roles/', None, admin_headers
+
+        def user_role_add(index):
+            return f'/api/users/{rng.choice(users).pk}/roles/', {'role_id': rng.choice(roles).pk}, admin_headers
+
+        def user_role_remove(index):
+            user, role = rng.choice(users), rng.choice(roles)
+            UserRole.objects.update_or_create(user=user, role=role, defaults={'is_active': True})
+            return f'/api/users/{user.pk}/roles/{role.pk}/', None, admin_headers
+
+        def bulk(path):
+            return lambda index: (path, {'role_id': rng.choice(roles).pk, 'user_ids': member_ids}, admin_headers)
+
+        return [
+            ('auth.register', 'post', {201}, register),
+            ('auth.login', 'post', {200}, fixed('/api/auth/login/', {
+                'username': admin.username, 'password': PASSWORDS[0],
+            }, {})),
+            ('auth.logout', 'post', {200}, logout),
+            ('auth.profile.get', 'get', {200}, fixed('/api/auth/profile/')),
+            ('auth.profile.patch', 'patch', {200}, fixed('/api/auth/profile/', {'first_name': 'Bench'})),
+            ('auth.password_change', 'post', {200}, password_change),
+            ('auth.token_refresh', 'post', {200}, token_refresh),
+            ('auth.token_verify', 'post', {200}, token_verify),
+            ('roles.list', 'get', {200}, fixed('/api/roles/')),
+            ('roles.create', 'post', {201}, role_create),
+            ('roles.detail.get', 'get', {200}, role_detail),
+            ('roles.detail.patch', 'patch', {200}, role_update),
+            ('roles.detail.delete', 'delete', {200, 204}, role_delete),
+            ('user_roles.list', 'get', {200}, user_roles),
+            ('user_roles.add', 'post', {200, 201}, user_role_add),
+            ('user_roles.remove', 'delete', {200}, user_role_remove),
+            ('user_roles.bulk_assign', 'post', {200}, bulk('/api/users/roles/bulk-assign/')),
+            ('user_roles.bulk_revoke', 'post', {200}, bulk('/api/users/roles/bulk-revoke/')),
+        ]
+
+    def auth_headers(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RevocableRefreshToken.for_user(user).access_token}'}
+
+    def measure(self, method, expected, prepare, iterations, warmup):
+        """
+        Send warmup + iterations requests; return latency percentiles, throughput and SQL stats.
+        """
+        client = Client(HTTP_HOST='localhost')
+        send = getattr(client, method)
+        latencies, query_counts, sql_times, errors = [], [], [], 0
+        measured_time = 0.0
+
+        for index in range(warmup + iterations):
+            path, data, headers = prepare(index)
+            client.cookies.clear()
+            kwargs = {'content_type': 'application/json'} if data is not None else {}
+            timer = QueryTimer()
+            # Nothing commits inside the benchmark transaction: run on_commit callbacks
+            # (cache invalidation) after each request as a commit would
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                with connection.execute_wrapper(timer):
+                    start = time.perf_counter()
+                    response = send(path, data, **kwargs, **headers)
+                    elapsed = time.perf_counter() - start
+            if index < warmup:
+                continue
+            measured_time += elapsed
+            latencies.append(elapsed)
+            query_counts.append(timer.count)
+            sql_times.append(timer.elapsed)
+            if response.status_code not in expected:
+                errors += 1
+
+        summary = summarize_latencies(latencies, measured_time)
+        summary.update({
+            'queries': round(sum(query_counts) / len(query_counts), 2) if query_counts else 0,
+            'max_queries': max(query_counts, default=0),
+            'sql_ms': round(sum(sql_times) / len(sql_times) * 1000, 3) if sql_times else 0.0,
+            'errors': errors,
+        })
+        return summary
+
+    def compare(self, previous, results, threshold):
+        """
+        Print the change of each endpoint against a previous run; return the regressed endpoints.
+        """
+        regressions = []
+        self.stdout.write(f"\nCompared with {previous['meta'].get('commit') or previous['meta']['timestamp']}:")
+        for name, summary in results['endpoints'].items():
+            before = previous['endpoints'].get(name)
+            if before is None:
+                continue
+            p95_change = (
+                (summary['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+            )
+            query_change = summary['queries'] - before['queries']
+            regressed = p95_change > threshold or query_change > 0
+            if regressed:
+                regressions.append(name)
+            line = f"{name:<28} p95 {p95_change:+7.1f}%  queries {query_change:+.2f}"
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+        return regressions
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
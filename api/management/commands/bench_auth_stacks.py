@@ -0,0 +1,95 @@
+# Python Standard Library
+import asyncio
+import json
+import secrets
+import time
+import uuid
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+# Local Apps
+from utils.benchmark import asgi_request, summarize_latencies
+
+User = get_user_model()
+
+STACKS = {
+    'sync': '/api/auth/',
+    'async': '/api/auth/async/',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async authentication endpoints under concurrent load through ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=('profile', 'login'), default='profile')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per stack.')
+        parser.add_argument('--concurrency', type=int, default=500, help='Concurrent connections.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        # The requests run on other connections, so the user cannot live in a rolled back
+        # transaction (like bench_api): it gets a random password and is deleted afterwards
+        options['username'] = f'bench_auth_{uuid.uuid4().hex[:8]}'
+        options['password'] = secrets.token_urlsafe(16)
+        user = User.objects.create_user(username=options['username'], password=options['password'])
+        try:
+            # Measure the endpoints themselves, not the login throttles
+            with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}):
+                results = asyncio.run(self.run(options))
+        finally:
+            user.delete()
+
+        for stack, summary in results.items():
+            self.stdout.write(
+                f"{stack:>5}: {summary['requests']} req, {summary['errors']} errors, "
+                f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms, "
+                f"{summary['throughput_rps']} req/s"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    async def run(self, options):
+        application = ASGIHandler()
+        credentials = {'username': options['username'], 'password': options['password']}
+        status_code, body = await asgi_request(application, 'POST', '/api/auth/async/login/', credentials)
+        if status_code != 200:
+            raise RuntimeError(f'Login failed ({status_code}): {body[:200]!r}')
+        headers = {'Authorization': f"Bearer {json.loads(body)['tokens']['access']}"}
+
+        results = {}
+        for stack, prefix in STACKS.items():
+            if options['endpoint'] == 'login':
+                request = ('POST', f'{prefix}login/', credentials, None)
+            else:
+                request = ('GET', f'{prefix}profile/', None, headers)
+            results[stack] = await self.load(application, request, options['requests'], options['concurrency'])
+        return results
+
+    async def load(self, application, request, total, concurrency):
+        method, path, body, headers = request
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                status_code, _body = await asgi_request(application, method, path, body, headers)
+                latencies.append(time.perf_counter() - started)
+                if status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        summary = summarize_latencies(latencies, time.perf_counter() - started)
+        summary['errors'] = errors
+        return summary
@@ -0,0 +1,59 @@
+# Python Standard Library
+import sys
+import time
+
+# Django Built-in modules
+from django.core.management.base import BaseCommand, CommandError
+
+# Local Apps
+from utils.export import EXPORT_DATASETS, EXPORT_FORMATS, stream_export
+from ...serializers import ExportFilterSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream users, user roles or roles as NDJSON or CSV, like the /api/export/ endpoints. '
+        'Rows are read and written chunk by chunk, so memory use does not depend on the row count.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORT_DATASETS))
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson', dest='file_format')
+        parser.add_argument('--output', default='-', help='Output file (default: stdout).')
+        parser.add_argument('--role', help='Role code: rows holding or granting the role (or inheriting it).')
+        active = parser.add_mutually_exclusive_group()
+        active.add_argument('--active', action='store_const', const=True, dest='is_active')
+        active.add_argument('--inactive', action='store_const', const=False, dest='is_active')
+        parser.add_argument('--since', help='Created at or after (ISO 8601).')
+        parser.add_argument('--until', help='Created before (ISO 8601).')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows fetched at a time.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] is not None and options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        filters = {
+            name: options[name] for name in ('role', 'is_active', 'since', 'until') if options[name] is not None
+        }
+        serializer = ExportFilterSerializer(data=filters)
+        if not serializer.is_valid():
+            raise CommandError('; '.join(
+                f"{field}: {' '.join(str(error) for error in errors)}" for field, errors in serializer.errors.items()
+            ))
+
+        started = time.perf_counter()
+        chunks = stream_export(
+            options['dataset'], options['file_format'], options['chunk_size'], **serializer.validated_data
+        )
+        size = 0
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        # stdout may hold the export itself
+        self.stderr.write(
+            f"Exported {options['dataset']} ({size / 1024 / 1024:.1f} MiB) in {time.perf_counter() - started:.1f} s."
+        )
@@ -0,0 +1,231 @@
+# Python Standard Library
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+
+# Django Built-in modules
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.translation import gettext as _
+
+# Local Apps
+from utils.roles import invalidate_all_roles
+from utils.user_import import IMPORT_FORMATS, get_import_format, init_worker, iter_import_rows, prepare_rows
+from ...models import Role, UserRole, UserRoleMask
+from ...serializers import UserRegistrationSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users from a CSV (with a header line) or NDJSON file with the columns username, email, '
+        'first_name, last_name, password and roles (role codes). Rows are validated and passwords '
+        'hashed in worker processes; each batch of users, user roles and role masks is inserted in '
+        'one transaction. Progress is checkpointed, so a failed import resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='CSV or NDJSON file.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, dest='file_format', help='Default: from the extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes validating rows and hashing passwords; the main process does the inserts.'
+        )
+        parser.add_argument(
+            '--role', action='append', default=[], dest='roles',
+            help='Role code given to every imported user (repeatable), besides the roles of the row.'
+        )
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <input>.checkpoint).')
+        parser.add_argument('--errors', help='NDJSON file of the rejected rows (default: <input>.errors.ndjson).')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint.')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        if not os.path.isfile(path):
+            raise CommandError(f"'{path}' does not exist.")
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive.')
+        file_format = get_import_format(path, options['file_format'])
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        errors_path = options['errors'] or f'{path}.errors.ndjson'
+
+        roles = self.load_roles()
+        unknown = set(options['roles']) - roles.keys()
+        if unknown:
+            raise CommandError(f"Unknown or inactive roles: {', '.join(sorted(unknown))}.")
+        checkpoint = self.load_checkpoint(checkpoint_path, path, options['restart'])
+        if checkpoint['row']:
+            self.stdout.write(f"Resuming after row {checkpoint['row']}.")
+
+        started = time.perf_counter()
+        rows = itertools.dropwhile(lambda item: item[0] <= checkpoint['row'], iter_import_rows(path, file_format))
+        batches = iter(lambda: list(itertools.islice(rows, options['batch_size'])), [])
+        imported = rejected = 0
+        with open(errors_path, 'w' if options['restart'] or not checkpoint['row'] else 'a') as errors_file:
+            for prepared in self.prepare_batches(batches, options['workers']):
+                counts = self.insert_batch(prepared, roles, set(options['roles']), errors_file)
+                imported, rejected = imported + counts[0], rejected + counts[1]
+                # The checkpoint only moves past rows that are committed (or reported)
+                errors_file.flush()
+                checkpoint.update(
+                    row=prepared[-1][0],
+                    imported=checkpoint['imported'] + counts[0],
+                    rejected=checkpoint['rejected'] + counts[1],
+                )
+                self.save_checkpoint(checkpoint_path, checkpoint)
+                self.report(imported, rejected, started)
+
+        # bulk_create sends no signals
+        invalidate_all_roles()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {checkpoint['imported']} users, rejected {checkpoint['rejected']} rows "
+            f'(this run: {imported + rejected} rows in {elapsed:.1f} s, {(imported + rejected) / elapsed:.0f} rows/s).'
+        ))
+        if checkpoint['rejected']:
+            self.stdout.write(f"Rejected rows: {errors_path}")
+
+    def prepare_batches(self, batches, workers):
+        """
+        Yield the prepared batches in input order. At most 2 * workers batches are in flight,
+        so the input is read as fast as passwords are hashed, not all at once.
+        """
+        if workers == 1:
+            yield from map(prepare_rows, batches)
+            return
+        # Forked workers must not share the open database connection
+        connections.close_all()
+        with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.apply_async(prepare_rows, (batch,)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+    def load_roles(self):
+        """
+        Return {code: (id, bit)} of the active roles.
+        """
+        roles = {
+            code: (role_id, bit)
+            for code, role_id, bit in Role.objects.filter(is_active=True).values_list('code', 'id', 'bit')
+        }
+        missing = sorted(code for code, (_role_id, bit) in roles.items() if bit is None)
+        if missing:
+            raise CommandError(f"Roles without a bit: {', '.join(missing)}. Run rebuild_role_masks first.")
+        return roles
+
+    def load_checkpoint(self, checkpoint_path, path, restart):
+        """
+        Return the checkpoint of the input file, or a new one.
+        """
+        new = {'input': os.path.abspath(path), 'size': os.path.getsize(path), 'row': 0, 'imported': 0, 'rejected': 0}
+        if restart or not os.path.exists(checkpoint_path):
+            return new
+        with open(checkpoint_path) as file:
+            checkpoint = json.load(file)
+        if (checkpoint['input'], checkpoint['size']) != (new['input'], new['size']):
+            raise CommandError(f"'{checkpoint_path}' belongs to another input file; use --restart.")
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint_path, checkpoint):
+        temporary_path = f'{checkpoint_path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(checkpoint, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, checkpoint_path)
+
+    def insert_batch(self, prepared, roles, default_roles, errors_file):
+        """
+        Insert the valid rows of a prepared batch with their user roles and role masks in one
+        transaction; write the rejected rows to errors_file. Returns (imported, rejected).
+        Uniqueness is checked with one query per batch; the database constraints still apply.
+        """
+        errors, candidates = [], []
+        for row_number, data, row_errors in prepared:
+            if row_errors is None:
+                unknown = (set(data['roles']) | default_roles) - roles.keys()
+                if unknown:
+                    row_errors = {'roles': [_('نقش یافت نشد.') + f" ({', '.join(sorted(unknown))})"]}
+            if row_errors:
+                errors.append((row_number, row_errors))
+            else:
+                candidates.append((row_number, data))
+
+        # Taken by an existing user or by an earlier row of the batch
+        conflicts = User.objects.alias(email_lower=Lower('email')).filter(
+            Q(username__in=[data['username'] for _row_number, data in candidates])
+            | Q(email_lower__in=[data['email'].lower() for _row_number, data in candidates])
+        ).values_list('username', 'email') if candidates else []
+        taken_usernames = {username for username, _email in conflicts}
+        taken_emails = {email.lower() for _username, email in conflicts}
+        valid = []
+        for row_number, data in candidates:
+            row_errors = {}
+            if data['username'] in taken_usernames:
+                row_errors['username'] = [str(UserRegistrationSerializer.username_taken_message)]
+            if data['email'].lower() in taken_emails:
+                row_errors['email'] = [str(UserRegistrationSerializer.email_taken_message)]
+            if row_errors:
+                errors.append((row_number, row_errors))
+                continue
+            taken_usernames.add(data['username'])
+            taken_emails.add(data['email'].lower())
+            valid.append(data)
+
+        if valid:
+            self.create_users(valid, roles, default_roles)
+        for row_number, row_errors in sorted(errors, key=lambda error: error[0]):
+            errors_file.write(json.dumps({'row': row_number, 'errors': row_errors}, ensure_ascii=False) + '\n')
+        return len(valid), len(errors)
+
+    def create_users(self, rows, roles, default_roles):
+        """
+        Insert users with their user roles and role masks in one transaction.
+        """
+        with transaction.atomic():
+            created = User.objects.bulk_create([
+                User(
+                    username=data['username'],
+                    email=data['email'],
+                    first_name=data.get('first_name', ''),
+                    last_name=data.get('last_name', ''),
+                    password=data['password'],
+                )
+                for data in rows
+            ])
+            user_ids = [user.pk for user in created]
+            if None in user_ids:
+                # The backend cannot return ids from a bulk insert
+                ids = dict(User.objects.filter(
+                    username__in=[data['username'] for data in rows],
+                ).values_list('username', 'id'))
+                user_ids = [ids[data['username']] for data in rows]
+
+            user_roles, masks = [], []
+            for user_id, data in zip(user_ids, rows):
+                codes = set(data['roles']) | default_roles
+                user_roles += [UserRole(user_id=user_id, role_id=roles[code][0]) for code in codes]
+                masks.append(UserRoleMask(user_id=user_id, mask=sum(1 << roles[code][1] for code in codes)))
+            UserRole.objects.bulk_create(user_roles)
+            UserRoleMask.objects.bulk_create(masks)
+
+    def report(self, imported, rejected, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{imported} users imported, {rejected} rows rejected '
+            f'({(imported + rejected) / elapsed:.0f} rows/s)'
+        )
@@ -0,0 +1,16 @@
+# Django Built-in modules
+from django.core.management.base import BaseCommand
+
+# Local Apps
+from utils.revocation import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked tokens that have expired (run it periodically, e.g. daily from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired revoked tokens.'))
@@ -0,0 +1,54 @@
+# Python Standard Library
+import time
+
+# Django Built-in modules
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+
+# Local Apps
+from utils.roles import invalidate_all_roles, sync_role_masks
+from ...models import Role
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the role masks of all users from their user roles, one user id range per transaction. '
+        'Roles without a bit (e.g. created with bulk_create) get one first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help='User ids per transaction.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        started = time.perf_counter()
+        role_ids = list(Role.objects.filter(bit__isnull=True).order_by('-is_active', 'id').values_list('id', flat=True))
+        if role_ids:
+            try:
+                bits = Role.get_free_bits(len(role_ids))
+            except ValidationError as e:
+                raise CommandError(e.messages[0])
+            with transaction.atomic():
+                for role_id, bit in zip(role_ids, bits):
+                    Role.objects.filter(id=role_id).update(bit=bit)
+            self.stdout.write(f'Assigned bits to {len(role_ids)} roles.')
+
+        bounds = User.objects.aggregate(first=Min('id'), last=Max('id'))
+        rows = 0
+        if bounds['first'] is not None:
+            for start in range(bounds['first'], bounds['last'] + 1, options['chunk_size']):
+                with transaction.atomic():
+                    rows += sync_role_masks(user_id__gte=start, user_id__lte=start + options['chunk_size'] - 1)
+
+        # Cached masks may be stale
+        invalidate_all_roles()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} role masks in {time.perf_counter() - started:.1f} s.'
+        ))
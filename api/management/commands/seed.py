@@ -0,0 +1,164 @@
+# Python Standard Library
+import multiprocessing
+import os
+import time
+from datetime import timedelta
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+# Local Apps
+from utils.roles import invalidate_all_roles
+from utils.seeding import generate_user_chunk
+from ...models import Role, RoleClosure, UserRole, UserRoleMask
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic users, roles and user roles for load testing. '
+        'All users share one precomputed password hash; rows are inserted with bulk_create. '
+        'Development databases only: refuses to run with DEBUG off.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000)
+        parser.add_argument('--roles', type=int, default=50)
+        parser.add_argument('--roles-per-user', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0, help='Same seed, same rows.')
+        parser.add_argument('--prefix', default='seed_', help='Username and role code prefix.')
+        parser.add_argument('--password', default='Seed-User-Pass-1', help='Password of every seeded user.')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Users per generated chunk / transaction.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per INSERT (default: backend maximum).')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes generating rows; the main process does the inserts.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG:
+            raise CommandError('Every seeded user has the same known password: seed only runs with DEBUG on.')
+        prefix = options['prefix']
+        if options['users'] < 0 or options['roles'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--users and --roles must not be negative and --chunk-size must be positive.')
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users with the prefix '{prefix}' already exist; use another --prefix.")
+
+        started = time.perf_counter()
+        role_ids, role_bits = self.seed_roles(prefix, options['roles'])
+        # Hash once: this is what makes the seeding fast
+        password = make_password(options['password'])
+        joined_base = timezone.now()
+
+        tasks = [
+            (
+                options['seed'], start, min(options['chunk_size'], options['users'] - start),
+                prefix, len(role_ids), options['roles_per_user'],
+            )
+            for start in range(0, options['users'], options['chunk_size'])
+        ]
+
+        user_count = user_role_count = 0
+        if options['workers'] > 1 and len(tasks) > 1:
+            # Forked workers must not share the open database connection
+            connections.close_all()
+            with multiprocessing.Pool(options['workers']) as pool:
+                for chunk in pool.imap(generate_user_chunk, tasks):
+                    counts = self.insert_chunk(
+                        chunk, password, joined_base, role_ids, role_bits, options['batch_size']
+                    )
+                    user_count, user_role_count = user_count + counts[0], user_role_count + counts[1]
+                    self.report(user_count, user_role_count, started)
+        else:
+            for task in tasks:
+                counts = self.insert_chunk(
+                    generate_user_chunk(task), password, joined_base, role_ids, role_bits, options['batch_size']
+                )
+                user_count, user_role_count = user_count + counts[0], user_role_count + counts[1]
+                self.report(user_count, user_role_count, started)
+
+        # bulk_create sends no signals
+        invalidate_all_roles()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(role_ids)} roles, {user_count} users and {user_role_count} user roles '
+            f'in {elapsed:.1f} s ({(user_count + user_role_count) / elapsed:.0f} rows/s).'
+        ))
+
+    def seed_roles(self, prefix, count):
+        """
+        Create the seeded roles that do not exist yet; return their ids and bits in code order.
+        """
+        codes = [f'{prefix}role_{index:04d}' for index in range(count)]
+        existing = set(Role.objects.filter(code__in=codes).values_list('code', flat=True))
+        new_codes = [code for code in codes if code not in existing]
+        try:
+            bits = Role.get_free_bits(len(new_codes))
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        Role.objects.bulk_create([
+            Role(name=code, code=code, description='Seeded role', bit=bit)
+            for code, bit in zip(new_codes, bits)
+        ])
+        ids, bits = {}, {}
+        for code, role_id, bit in Role.objects.filter(code__in=codes).values_list('code', 'id', 'bit'):
+            ids[code], bits[code] = role_id, bit
+        # bulk_create skips Role.save: seeded roles are roots of the hierarchy
+        RoleClosure.objects.bulk_create([
+            RoleClosure(ancestor_id=role_id, descendant_id=role_id, depth=0)
+            for role_id in ids.values()
+        ], ignore_conflicts=True)
+        return [ids[code] for code in codes], [bits[code] for code in codes]
+
+    def insert_chunk(self, chunk, password, joined_base, role_ids, role_bits, batch_size):
+        """
+        Insert one chunk of users, their roles and role masks in a single transaction.
+        """
+        users, user_roles = chunk
+        if not users:
+            return 0, 0
+        with transaction.atomic():
+            created = User.objects.bulk_create([
+                User(
+                    username=username,
+                    email=email,
+                    first_name=first_name,
+                    last_name=last_name,
+                    password=password,
+                    date_joined=joined_base - timedelta(seconds=joined_seconds_ago),
+                )
+                for username, email, first_name, last_name, joined_seconds_ago in users
+            ], batch_size=batch_size)
+            user_ids = [user.pk for user in created]
+            if None in user_ids:
+                # The backend cannot return ids from a bulk insert: usernames sort in insert order
+                user_ids = list(User.objects.filter(
+                    username__gte=users[0][0],
+                    username__lte=users[-1][0],
+                ).order_by('username').values_list('id', flat=True))
+
+            user_role_rows = [
+                UserRole(user_id=user_id, role_id=role_ids[role_index])
+                for user_id, role_indexes in zip(user_ids, user_roles)
+                for role_index in role_indexes
+            ]
+            UserRole.objects.bulk_create(user_role_rows, batch_size=batch_size)
+            UserRoleMask.objects.bulk_create([
+                UserRoleMask(user_id=user_id, mask=sum(1 << role_bits[role_index] for role_index in role_indexes))
+                for user_id, role_indexes in zip(user_ids, user_roles)
+            ], batch_size=batch_size)
+        return len(users), len(user_role_rows)
+
+    def report(self, user_count, user_role_count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{user_count} users, {user_role_count} user roles '
+            f'({(user_count + user_role_count) / elapsed:.0f} rows/s)'
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='role',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created', '-id'], name='api_role_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userrole',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-created', '-id'], name='api_userrole_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userrole',
+            index=models.Index(fields=['-created', '-id'], name='api_userrole_created_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Stop before creating the index if emails already differ only by case.
+    Which account keeps an email is a decision for an administrator: list them all.
+    """
+    users = apps.get_model(settings.AUTH_USER_MODEL).objects.using(schema_editor.connection.alias)
+    duplicates = users.exclude(email='').values(email_lower=Lower('email')).annotate(
+        count=Count('id'),
+    ).filter(count__gt=1).order_by('email_lower')
+    lines = []
+    for row in duplicates:
+        ids = users.filter(email__iexact=row['email_lower']).order_by('id').values_list('id', flat=True)
+        lines.append(f"  {row['email_lower']}: users {', '.join(map(str, ids))}")
+    if lines:
+        raise RuntimeError(
+            'Emails must be unique regardless of case. Change or clear the emails of these users, '
+            'then run migrate again:\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_role_userrole_indexes'),
+        # After the last auth migration: altering the table on SQLite would drop the index
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # Case-insensitive unique index on the user email (empty emails excluded); auth_user is
+        # the table of the default user model
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX "api_user_email_ci_uniq" ON "auth_user" (LOWER("email")) WHERE "email" <> \'\'',
+            'DROP INDEX "api_user_email_ci_uniq"',
+        ),
+    ]
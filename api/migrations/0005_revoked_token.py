@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_user_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')),
+                ('jti', models.CharField(max_length=64, unique=True, verbose_name='شناسه توکن')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='تاریخ انقضا')),
+            ],
+            options={
+                'verbose_name': 'توکن باطل شده',
+                'verbose_name_plural': 'توکن\u200cهای باطل شده',
+                'indexes': [models.Index(fields=['created'], name='api_revokedtoken_created_idx')],
+            },
+        ),
+    ]
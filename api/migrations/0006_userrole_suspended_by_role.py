@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+def suspend_user_roles_of_inactive_roles(apps, schema_editor):
+    """
+    Active user roles of already inactive roles get the state Role.set_active would give them.
+    """
+    UserRole = apps.get_model('api', 'UserRole')
+    UserRole.objects.filter(role__is_active=False, is_active=True).update(is_active=False, suspended_by_role=True)
+
+
+def restore_suspended_user_roles(apps, schema_editor):
+    UserRole = apps.get_model('api', 'UserRole')
+    UserRole.objects.filter(suspended_by_role=True).update(is_active=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_revoked_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userrole',
+            name='suspended_by_role',
+            field=models.BooleanField(default=False, help_text='با غیرفعال شدن نقش غیرفعال شده و با فعال شدن دوباره آن فعال می\u200cشود.', verbose_name='غیرفعال با نقش'),
+        ),
+        migrations.RunPython(suspend_user_roles_of_inactive_roles, restore_suspended_user_roles),
+    ]
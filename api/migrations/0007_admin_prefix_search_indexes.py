@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import migrations
+
+# (index name, column) of the user admin prefix searches (istartswith).
+# Roles are few: their prefix search needs no index.
+PREFIX_INDEXES = (
+    ('api_user_username_prefix_idx', 'username'),
+    ('api_user_email_prefix_idx', 'email'),
+)
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """
+    Indexes matching the SQL of case-insensitive prefix lookups.
+    PostgreSQL: UPPER(column::text) LIKE UPPER(%s) needs a pattern_ops expression index.
+    SQLite: case-insensitive LIKE can only use a NOCASE index.
+    Other backends (MySQL) use the plain column indexes.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    vendor = schema_editor.connection.vendor
+    for name, column in PREFIX_INDEXES:
+        column = schema_editor.quote_name(column)
+        if vendor == 'postgresql':
+            expression = 'UPPER(%s::text) text_pattern_ops' % column
+        elif vendor == 'sqlite':
+            expression = '%s COLLATE NOCASE' % column
+        else:
+            return
+        schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (
+            schema_editor.quote_name(name),
+            schema_editor.quote_name(User._meta.db_table),
+            expression,
+        ))
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    for name, _column in PREFIX_INDEXES:
+        schema_editor.execute('DROP INDEX %s' % schema_editor.quote_name(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_userrole_suspended_by_role'),
+        # After the last auth migration: altering the table on SQLite would drop the indexes
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
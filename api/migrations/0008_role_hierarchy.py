@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_self_links(apps, schema_editor):
+    """
+    Existing roles have no parent: each one is its own only ancestor.
+    """
+    Role = apps.get_model('api', 'Role')
+    RoleClosure = apps.get_model('api', 'RoleClosure')
+    RoleClosure.objects.bulk_create([
+        RoleClosure(ancestor_id=role_id, descendant_id=role_id, depth=0)
+        for role_id in Role.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_admin_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='role',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='دارندگان این نقش، نقش والد و نقش\u200cهای بالاتر آن را نیز دارند (مثلاً: manager ← staff ← customer).', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='api.role', verbose_name='نقش والد'),
+        ),
+        migrations.CreateModel(
+            name='RoleClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='فاصله')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='api.role', verbose_name='نقش نیا')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='api.role', verbose_name='نقش نواده')),
+            ],
+            options={
+                'verbose_name': 'رابطه سلسله مراتب نقش',
+                'verbose_name_plural': 'روابط سلسله مراتب نقش\u200cها',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='api_roleclosure_desc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(create_self_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+ROLE_MASK_BITS = 63
+
+
+def assign_bits_and_build_masks(apps, schema_editor):
+    """
+    Give existing roles bits (active roles first) and build the masks of their users.
+    """
+    Role = apps.get_model('api', 'Role')
+    UserRole = apps.get_model('api', 'UserRole')
+    UserRoleMask = apps.get_model('api', 'UserRoleMask')
+
+    role_ids = list(Role.objects.order_by('-is_active', 'id').values_list('id', flat=True))
+    if len(role_ids) > ROLE_MASK_BITS:
+        raise RuntimeError(f'At most {ROLE_MASK_BITS} roles fit in a role mask; {len(role_ids)} roles exist.')
+    for bit, role_id in enumerate(role_ids):
+        Role.objects.filter(id=role_id).update(bit=bit)
+
+    masks = {}
+    for user_id, bit in UserRole.objects.filter(
+        is_active=True,
+        role__is_active=True,
+    ).values_list('user_id', 'role__bit').iterator(chunk_size=10000):
+        masks[user_id] = masks.get(user_id, 0) | 1 << bit
+    UserRoleMask.objects.bulk_create([
+        UserRoleMask(user_id=user_id, mask=mask)
+        for user_id, mask in masks.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('api', '0008_role_hierarchy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='role',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='جایگاه ثابت نقش در ماسک نقش\u200cهای کاربران', null=True, unique=True, verbose_name='بیت نقش'),
+        ),
+        migrations.CreateModel(
+            name='UserRoleMask',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='role_mask', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+                ('mask', models.BigIntegerField(default=0, verbose_name='ماسک نقش\u200cها')),
+            ],
+            options={
+                'verbose_name': 'ماسک نقش\u200cهای کاربر',
+                'verbose_name_plural': 'ماسک نقش\u200cهای کاربران',
+                'indexes': [models.Index(fields=['mask'], name='api_userrolemask_mask_idx')],
+            },
+        ),
+        migrations.RunPython(assign_bits_and_build_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0009_role_masks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')),
+                ('occurred_at', models.DateTimeField(verbose_name='زمان رخداد')),
+                ('action', models.CharField(choices=[('role.created', 'ایجاد نقش'), ('role.updated', 'ویرایش نقش'), ('role.activated', 'فعال\u200cسازی نقش'), ('role.deactivated', 'غیرفعال\u200cسازی نقش'), ('user_role.assigned', 'اختصاص نقش به کاربر'), ('user_role.removed', 'حذف نقش از کاربر'), ('password.changed', 'تغییر رمز عبور')], max_length=32, verbose_name='عملیات')),
+                ('target_type', models.CharField(choices=[('role', 'نقش'), ('user', 'کاربر')], max_length=16, verbose_name='نوع هدف')),
+                ('target_id', models.PositiveBigIntegerField(verbose_name='شناسه هدف')),
+                ('data', models.JSONField(blank=True, default=dict, verbose_name='جزئیات')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='آدرس IP')),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='انجام دهنده')),
+            ],
+            options={
+                'verbose_name': 'رویداد ممیزی',
+                'verbose_name_plural': 'رویدادهای ممیزی',
+                'indexes': [models.Index(fields=['actor', '-occurred_at', '-id'], name='api_auditevent_actor_idx'), models.Index(fields=['target_type', 'target_id', '-occurred_at', '-id'], name='api_auditevent_target_idx'), models.Index(fields=['-occurred_at', '-id'], name='api_auditevent_occurred_idx')],
+            },
+        ),
+    ]
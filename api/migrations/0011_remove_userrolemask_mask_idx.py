@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_audit_event'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userrolemask',
+            name='api_userrolemask_mask_idx',
+        ),
+    ]
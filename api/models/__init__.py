@@ -1,9 +1,17 @@
 # Local Apps
 from .role import Role
 from .user_role import UserRole
+from .role_closure import RoleClosure
+from .user_role_mask import UserRoleMask
+from .revoked_token import RevokedToken
+from .audit_event import AuditEvent
 
 __all__ = [
     'Role',
     'UserRole',
+    'RoleClosure',
+    'UserRoleMask',
+    'RevokedToken',
+    'AuditEvent',
 ]
 
@@ -0,0 +1,102 @@
+# Django Built-in modules
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+# Local Apps
+from utils.models import AbstractDateTimeModel
+
+User = get_user_model()
+
+
+class AuditEventQuerySet(models.QuerySet):
+
+    def matching(self, actor_id=None, target_type=None, target_id=None, action=None, since=None, until=None):
+        """
+        Filter on any of actor, target, action and occurred_at range [since, until).
+        Actor, target and time range queries each have an index ending in (-occurred_at, -id).
+        """
+        filters = {
+            'actor_id': actor_id,
+            'target_type': target_type,
+            'target_id': target_id,
+            'action': action,
+            'occurred_at__gte': since,
+            'occurred_at__lt': until,
+        }
+        return self.filter(**{lookup: value for lookup, value in filters.items() if value is not None})
+
+
+class AuditEvent(AbstractDateTimeModel):
+    """
+    Audit record of a role or account change.
+    Written in batches by the background writer of utils/audit.py, so `created` is the
+    insert time and `occurred_at` the time of the change. Actor and target ids are kept
+    without a foreign key constraint: the record outlives deleted users and roles.
+    """
+
+    class Action(models.TextChoices):
+        ROLE_CREATED = 'role.created', _('ایجاد نقش')
+        ROLE_UPDATED = 'role.updated', _('ویرایش نقش')
+        ROLE_ACTIVATED = 'role.activated', _('فعال‌سازی نقش')
+        ROLE_DEACTIVATED = 'role.deactivated', _('غیرفعال‌سازی نقش')
+        USER_ROLE_ASSIGNED = 'user_role.assigned', _('اختصاص نقش به کاربر')
+        USER_ROLE_REMOVED = 'user_role.removed', _('حذف نقش از کاربر')
+        PASSWORD_CHANGED = 'password.changed', _('تغییر رمز عبور')
+
+    class TargetType(models.TextChoices):
+        ROLE = 'role', _('نقش')
+        USER = 'user', _('کاربر')
+
+    occurred_at = models.DateTimeField(
+        verbose_name=_('زمان رخداد'),
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        # Covered by api_auditevent_actor_idx
+        db_index=False,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name=_('انجام دهنده'),
+    )
+    action = models.CharField(
+        max_length=32,
+        choices=Action.choices,
+        verbose_name=_('عملیات'),
+    )
+    target_type = models.CharField(
+        max_length=16,
+        choices=TargetType.choices,
+        verbose_name=_('نوع هدف'),
+    )
+    target_id = models.PositiveBigIntegerField(
+        verbose_name=_('شناسه هدف'),
+    )
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_('جزئیات'),
+    )
+    ip_address = models.GenericIPAddressField(
+        blank=True,
+        null=True,
+        verbose_name=_('آدرس IP'),
+    )
+
+    objects = AuditEventQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('رویداد ممیزی')
+        verbose_name_plural = _('رویدادهای ممیزی')
+        indexes = [
+            # Query API: newest first by actor, by target, or by time range only (keyset pagination)
+            models.Index(fields=['actor', '-occurred_at', '-id'], name='api_auditevent_actor_idx'),
+            models.Index(fields=['target_type', 'target_id', '-occurred_at', '-id'], name='api_auditevent_target_idx'),
+            models.Index(fields=['-occurred_at', '-id'], name='api_auditevent_occurred_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.action} {self.target_type}:{self.target_id}'
@@ -0,0 +1,34 @@
+# Django Built-in modules
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+# Local Apps
+from utils.models import AbstractDateTimeModel
+
+
+class RevokedToken(AbstractDateTimeModel):
+    """
+    Revoked JWT (refresh tokens on rotation / logout, access tokens on logout).
+    Rows are only needed until the token expires; see the prune_revoked_tokens command.
+    Lookups go through utils/revocation.py, which keeps a Bloom filter of these ids in memory.
+    """
+    jti = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name=_('شناسه توکن'),
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        verbose_name=_('تاریخ انقضا'),
+    )
+
+    class Meta:
+        verbose_name = _('توکن باطل شده')
+        verbose_name_plural = _('توکن‌های باطل شده')
+        indexes = [
+            # Incremental sync of the in-memory Bloom filters
+            models.Index(fields=['created'], name='api_revokedtoken_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.jti
@@ -1,10 +1,15 @@
 # Django Built-in modules
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 # Local Apps
 from utils.models import AbstractDateTimeModel
 
+# Bit positions of a signed 64-bit role mask (see UserRoleMask)
+ROLE_MASK_BITS = 63
+
 
 class Role(AbstractDateTimeModel):
     """
@@ -30,12 +35,127 @@ class Role(AbstractDateTimeModel):
         default=True,
         verbose_name=_('فعال'),
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        related_name='children',
+        verbose_name=_('نقش والد'),
+        help_text=_('دارندگان این نقش، نقش والد و نقش‌های بالاتر آن را نیز دارند (مثلاً: manager ← staff ← customer).'),
+    )
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=_('بیت نقش'),
+        help_text=_('جایگاه ثابت نقش در ماسک نقش‌های کاربران'),
+    )
 
     class Meta:
         ordering = ('-created',)
         verbose_name = _('نقش')
         verbose_name_plural = _('نقش‌ها')
+        indexes = [
+            # Active role listing, sorted by the default ordering (and keyset pagination).
+            # Lookups by code use the unique index of code.
+            models.Index(
+                fields=['-created', '-id'],
+                condition=models.Q(is_active=True),
+                name='api_role_active_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def get_free_bits(cls, count):
+        """
+        Return the first `count` unused bit positions.
+        """
+        used = set(cls.objects.filter(bit__isnull=False).values_list('bit', flat=True))
+        free = [bit for bit in range(ROLE_MASK_BITS) if bit not in used][:count]
+        if len(free) < count:
+            raise ValidationError(_('حداکثر %(count)s نقش قابل تعریف است.') % {'count': ROLE_MASK_BITS})
+        return free
+
+    def get_descendant_ids(self):
+        """
+        Return ids of the roles that inherit from this role, including itself.
+        """
+        # Import here to avoid circular imports
+        from .role_closure import RoleClosure
+
+        return set(RoleClosure.objects.filter(ancestor_id=self.pk).values_list('descendant_id', flat=True))
+
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self.parent_id in self.get_descendant_ids():
+            raise ValidationError({'parent': _('نقش والد نمی‌تواند خود نقش یا یکی از نقش‌های زیرمجموعه آن باشد.')})
+        if self._state.adding and self.bit is None:
+            # Fail in forms (admin) before save() runs out of bits
+            Role.get_free_bits(1)
+
+    def save(self, *args, **kwargs):
+        """
+        Save the role and keep the closure table in step with a new or changed parent.
+        """
+        # Import here to avoid circular imports
+        from .role_closure import RoleClosure
+
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            if not adding and (update_fields is None or 'parent' in update_fields):
+                stored_parent_id = Role.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+                parent_changed = stored_parent_id != self.parent_id
+                if parent_changed:
+                    # Also enforced here: API and scripts do not call clean()
+                    self.clean()
+            else:
+                parent_changed = False
+            if adding and self.bit is None:
+                # A race on the same bit fails on the unique constraint
+                self.bit = Role.get_free_bits(1)[0]
+            super().save(*args, **kwargs)
+            if adding or parent_changed:
+                RoleClosure.objects.link(self.pk, self.parent_id, created=adding)
+
+    def set_active(self, is_active):
+        """
+        Activate or deactivate the role together with its user roles, in one transaction.
+        Runs set-based UPDATEs (no save() per row), so the size of the role does not matter.
+        Deactivation suspends the active user roles; activation restores only those.
+        The role bit of the affected users' masks is cleared / set the same way.
+        """
+        # Import here to avoid circular imports
+        from utils.roles import invalidate_all_roles
+        from .user_role import UserRole
+        from .user_role_mask import UserRoleMask
+
+        now = timezone.now()
+        bit_mask = 1 << self.bit if self.bit is not None else 0
+        with transaction.atomic():
+            Role.objects.filter(pk=self.pk).update(is_active=is_active, updated=now)
+            suspended_users = UserRole.objects.filter(role_id=self.pk, suspended_by_role=True).values('user_id')
+            if is_active:
+                UserRoleMask.objects.filter(user_id__in=suspended_users).update(
+                    mask=models.F('mask').bitor(bit_mask), updated=now
+                )
+                UserRole.objects.filter(role_id=self.pk, suspended_by_role=True).update(
+                    is_active=True, suspended_by_role=False, updated=now
+                )
+            else:
+                UserRole.objects.filter(role_id=self.pk, is_active=True).update(
+                    is_active=False, suspended_by_role=True, updated=now
+                )
+                UserRoleMask.objects.filter(user_id__in=suspended_users).update(
+                    mask=models.F('mask').bitand(~bit_mask), updated=now
+                )
+            # update() does not send post_save
+            transaction.on_commit(invalidate_all_roles)
+        self.is_active = is_active
+        self.updated = now
+
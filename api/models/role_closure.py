@@ -0,0 +1,75 @@
+# Django Built-in modules
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+# Local Apps
+from utils.models import AbstractDateTimeModel
+from .role import Role
+
+
+class RoleClosureManager(models.Manager):
+    """
+    Incremental maintenance of the role closure table (see Role.save).
+    """
+
+    def link(self, role_id, parent_id, created=False):
+        """
+        Attach the subtree of a role under a parent (None: make it a root).
+        Links from the old ancestors are removed and links from the new ones are added;
+        the role's own subtree is left untouched. Lists are materialized because some
+        backends do not allow a subquery on the table being changed.
+        """
+        subtree = [] if created else list(self.filter(ancestor_id=role_id).values_list('descendant_id', 'depth'))
+        new_links = []
+        if subtree:
+            subtree_ids = [descendant_id for descendant_id, _depth in subtree]
+            self.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        else:
+            # New role (or one created without Role.save, e.g. bulk_create)
+            subtree = [(role_id, 0)]
+            new_links.append(self.model(ancestor_id=role_id, descendant_id=role_id, depth=0))
+        if parent_id is not None:
+            ancestors = self.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+            new_links += [
+                self.model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth + 1)
+                for ancestor_id, ancestor_depth in ancestors
+                for descendant_id, depth in subtree
+            ]
+        self.bulk_create(new_links)
+
+
+class RoleClosure(AbstractDateTimeModel):
+    """
+    Closure table of the role hierarchy: one row per (ancestor, descendant) pair,
+    including (role, role) at depth 0. A user holding a role effectively holds all of
+    its ancestors, so the implied roles of any role are a single indexed lookup.
+    """
+    ancestor = models.ForeignKey(
+        Role,
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name=_('نقش نیا'),
+    )
+    descendant = models.ForeignKey(
+        Role,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name=_('نقش نواده'),
+    )
+    depth = models.PositiveSmallIntegerField(
+        verbose_name=_('فاصله'),
+    )
+
+    objects = RoleClosureManager()
+
+    class Meta:
+        verbose_name = _('رابطه سلسله مراتب نقش')
+        verbose_name_plural = _('روابط سلسله مراتب نقش‌ها')
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            # Implied roles of a role
+            models.Index(fields=['descendant', 'ancestor'], name='api_roleclosure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
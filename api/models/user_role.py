@@ -30,12 +30,31 @@ class UserRole(AbstractDateTimeModel):
         default=True,
         verbose_name=_('فعال'),
     )
+    suspended_by_role = models.BooleanField(
+        default=False,
+        verbose_name=_('غیرفعال با نقش'),
+        help_text=_('با غیرفعال شدن نقش غیرفعال شده و با فعال شدن دوباره آن فعال می‌شود.'),
+    )
 
     class Meta:
         ordering = ('-created',)
         verbose_name = _('نقش کاربر')
         verbose_name_plural = _('نقش‌های کاربران')
         unique_together = ('user', 'role')
+        indexes = [
+            # Active roles of a user, sorted by the default ordering and keyset pagination
+            # (permission checks, user role listing and profile roles)
+            models.Index(
+                fields=['user', '-created', '-id'],
+                condition=models.Q(is_active=True),
+                name='api_userrole_user_active_idx',
+            ),
+            # Default ordering of the whole table (admin changelist)
+            models.Index(
+                fields=['-created', '-id'],
+                name='api_userrole_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.role.name}'
@@ -0,0 +1,47 @@
+# Django Built-in modules
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+# Local Apps
+from utils.models import AbstractDateTimeModel
+
+User = get_user_model()
+
+
+class UserRoleMaskQuerySet(models.QuerySet):
+
+    def with_any_role(self, mask):
+        """
+        Rows holding any role bit of the mask: one integer predicate on one table.
+        A bitwise predicate cannot use a B-tree index: this is a scan of this narrow table.
+        """
+        return self.alias(matched_roles=models.F('mask').bitand(mask)).exclude(matched_roles=0)
+
+
+class UserRoleMask(AbstractDateTimeModel):
+    """
+    Denormalized bitmask of the active roles assigned to a user (bit = Role.bit).
+    Written in the same transaction as the user roles (see utils/roles.py sync_role_masks);
+    inherited roles are resolved when checking, so hierarchy changes do not touch it.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='role_mask',
+        verbose_name=_('کاربر'),
+    )
+    mask = models.BigIntegerField(
+        default=0,
+        verbose_name=_('ماسک نقش‌ها'),
+    )
+
+    objects = UserRoleMaskQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('ماسک نقش‌های کاربر')
+        verbose_name_plural = _('ماسک نقش‌های کاربران')
+
+    def __str__(self):
+        return f'{self.user_id}: {self.mask:b}'
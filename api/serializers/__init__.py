@@ -1,28 +1,54 @@
 # Local Apps
 from .auth import (
     UserRegistrationSerializer,
+    AsyncUserRegistrationSerializer,
+    UserImportSerializer,
     UserLoginSerializer,
     PasswordChangeSerializer,
+    AsyncPasswordChangeSerializer,
+    RoleTokenRefreshSerializer,
+    RoleTokenVerifySerializer,
 )
 from .user import (
     UserProfileSerializer,
     UserUpdateSerializer,
+    AsyncUserUpdateSerializer,
 )
 from .roles import (
     RoleSerializer,
     UserRoleSerializer,
+    UserRolePairSerializer,
+    BulkUserRoleSerializer,
 )
+from .audit import (
+    AuditEventSerializer,
+    AuditEventFilterSerializer,
+)
+from .export import ExportFilterSerializer
 
 __all__ = [
     # Authentication serializers
     'UserRegistrationSerializer',
+    'AsyncUserRegistrationSerializer',
+    'UserImportSerializer',
     'UserLoginSerializer',
     'PasswordChangeSerializer',
+    'AsyncPasswordChangeSerializer',
+    'RoleTokenRefreshSerializer',
+    'RoleTokenVerifySerializer',
     # User serializers
     'UserProfileSerializer',
     'UserUpdateSerializer',
+    'AsyncUserUpdateSerializer',
     # Role serializers
     'RoleSerializer',
     'UserRoleSerializer',
+    'UserRolePairSerializer',
+    'BulkUserRoleSerializer',
+    # Audit serializers
+    'AuditEventSerializer',
+    'AuditEventFilterSerializer',
+    # Export serializers
+    'ExportFilterSerializer',
 ]
 
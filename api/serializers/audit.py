@@ -0,0 +1,39 @@
+# Django Built-in modules
+from django.utils.translation import gettext_lazy as _
+
+# Third Party Packages
+from rest_framework import serializers
+
+# Local Apps
+from utils.instrumentation import TimedSerializerMixin
+from ..models import AuditEvent
+
+
+class AuditEventSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for AuditEvent model.
+    """
+    class Meta:
+        model = AuditEvent
+        fields = ('id', 'occurred_at', 'actor', 'action', 'target_type', 'target_id', 'data', 'ip_address')
+        read_only_fields = fields
+
+
+class AuditEventFilterSerializer(serializers.Serializer):
+    """
+    Query parameters of the audit event listing.
+    target_type and target_id go together.
+    """
+    actor = serializers.IntegerField(min_value=1, required=False)
+    target_type = serializers.ChoiceField(choices=AuditEvent.TargetType.choices, required=False)
+    target_id = serializers.IntegerField(min_value=1, required=False)
+    action = serializers.ChoiceField(choices=AuditEvent.Action.choices, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if ('target_type' in attrs) != ('target_id' in attrs):
+            raise serializers.ValidationError(_('target_type و target_id باید با هم ارسال شوند.'))
+        if 'since' in attrs and 'until' in attrs and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError(_('since باید قبل از until باشد.'))
+        return attrs
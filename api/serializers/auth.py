@@ -1,10 +1,26 @@
 # Django Built-in modules
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 # Third Party Packages
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Local Apps
+from utils.authentication import get_cached_user
+from utils.db import get_constraint_name
+from utils.revocation import is_token_revoked, revoke_token_once
+from utils.tokens import RevocableRefreshToken
 
 User = get_user_model()
 
@@ -12,7 +28,19 @@ User = get_user_model()
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration.
+    Username and email uniqueness is checked with a single query; the database
+    constraints catch concurrent registrations.
     """
+    username_taken_message = _('این نام کاربری قبلاً استفاده شده است. لطفاً نام کاربری دیگری انتخاب کنید.')
+    email_taken_message = _('این ایمیل قبلاً استفاده شده است. لطفاً ایمیل دیگری وارد کنید.')
+
+    # Unique constraint / index name -> field
+    unique_constraint_fields = {
+        'auth_user_username_key': 'username',  # PostgreSQL
+        'auth_user.username': 'username',  # SQLite
+        'api_user_email_ci_uniq': 'email',  # migration 0004_user_email_ci_unique
+    }
+
     password = serializers.CharField(
         write_only=True,
         required=True,
@@ -29,66 +57,122 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ('username', 'email', 'first_name', 'last_name', 'password', 'password_confirm')
         extra_kwargs = {
+            # Uniqueness is checked in validate(), together with the email
+            'username': {'validators': [UnicodeUsernameValidator()]},
             'email': {'required': True},
             'first_name': {'required': False},
             'last_name': {'required': False},
         }
 
-    def validate_username(self, value):
-        """
-        Validate that username is unique in the database.
-        """
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError(_('این نام کاربری قبلاً استفاده شده است. لطفاً نام کاربری دیگری انتخاب کنید.'))
-        return value
-
-    def validate_email(self, value):
-        """
-        Validate that email is unique in the database.
-        """
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError(_('این ایمیل قبلاً استفاده شده است. لطفاً ایمیل دیگری وارد کنید.'))
-        return value
-
     def validate(self, attrs):
         """
-        Validate that password and password_confirm match.
+        Validate that password and password_confirm match, and that username and email are unique.
         """
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError({
                 'password_confirm': _('رمز عبور و تأیید رمز عبور باید یکسان باشند.')
             })
+        errors = self.get_unique_errors(
+            attrs['username'],
+            attrs['email'],
+            list(self.get_conflicts_queryset(attrs['username'], attrs['email'])),
+        )
+        if errors:
+            raise serializers.ValidationError(errors)
         return attrs
 
+    @classmethod
+    def get_conflicts_queryset(cls, username, email):
+        """
+        Return (username, email) of the users conflicting with the given username or email.
+        """
+        return User.objects.alias(email_lower=Lower('email')).filter(
+            Q(username=username) | Q(email_lower=email.lower())
+        ).values_list('username', 'email')[:2]
+
+    @classmethod
+    def get_unique_errors(cls, username, email, conflicts):
+        """
+        Return field errors for the conflicting users found by get_conflicts_queryset().
+        """
+        errors = {}
+        for conflict_username, conflict_email in conflicts:
+            if conflict_username == username:
+                errors['username'] = [cls.username_taken_message]
+            if conflict_email.lower() == email.lower():
+                errors['email'] = [cls.email_taken_message]
+        return errors
+
+    @classmethod
+    def get_integrity_errors(cls, error):
+        """
+        Return field errors for a unique constraint violation, or None if it is another error.
+        """
+        field = cls.unique_constraint_fields.get(get_constraint_name(error))
+        if field == 'username':
+            return {'username': [cls.username_taken_message]}
+        if field == 'email':
+            return {'email': [cls.email_taken_message]}
+        return None
+
     def create(self, validated_data):
         """
         Create a new user with encrypted password.
         """
         validated_data.pop('password_confirm')
         try:
-            user = User.objects.create_user(
-                username=validated_data['username'],
-                email=validated_data['email'],
-                password=validated_data['password'],
-                first_name=validated_data.get('first_name', ''),
-                last_name=validated_data.get('last_name', ''),
-            )
-        except Exception as e:
-            # Handle database integrity errors
-            from django.db import IntegrityError
-            if isinstance(e, IntegrityError):
-                if 'username' in str(e).lower() or 'unique constraint' in str(e).lower():
-                    raise serializers.ValidationError({
-                        'username': _('این نام کاربری قبلاً استفاده شده است. لطفاً نام کاربری دیگری انتخاب کنید.')
-                    })
-                elif 'email' in str(e).lower():
-                    raise serializers.ValidationError({
-                        'email': _('این ایمیل قبلاً استفاده شده است. لطفاً ایمیل دیگری وارد کنید.')
-                    })
-            raise
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=validated_data['username'],
+                    email=validated_data['email'],
+                    password=validated_data['password'],
+                    first_name=validated_data.get('first_name', ''),
+                    last_name=validated_data.get('last_name', ''),
+                )
+        except IntegrityError as e:
+            # Lost a race with a concurrent registration
+            errors = self.get_integrity_errors(e)
+            if errors is None:
+                raise
+            raise serializers.ValidationError(errors)
         return user
 
 
+class AsyncUserRegistrationSerializer(UserRegistrationSerializer):
+    """
+    Serializer for user registration in async views.
+    Runs no database query: the caller checks username / email uniqueness with the async ORM.
+    """
+    def validate(self, attrs):
+        """
+        Validate that password and password_confirm match.
+        """
+        if attrs['password'] != attrs['password_confirm']:
+            raise serializers.ValidationError({
+                'password_confirm': _('رمز عبور و تأیید رمز عبور باید یکسان باشند.')
+            })
+        return attrs
+
+
+class UserImportSerializer(UserRegistrationSerializer):
+    """
+    Serializer for one row of the import_users command.
+    Runs no database query, so rows are validated in worker processes: the command checks
+    username / email uniqueness and role codes for a whole batch.
+    """
+    password_confirm = None
+    roles = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        default=list,
+    )
+
+    class Meta(UserRegistrationSerializer.Meta):
+        fields = ('username', 'email', 'first_name', 'last_name', 'password', 'roles')
+
+    def validate(self, attrs):
+        return attrs
+
+
 class UserLoginSerializer(serializers.Serializer):
     """
     Serializer for user login.
@@ -141,3 +225,57 @@ class PasswordChangeSerializer(serializers.Serializer):
             raise serializers.ValidationError(_('رمز عبور فعلی اشتباه است.'))
         return value
 
+
+
+class AsyncPasswordChangeSerializer(PasswordChangeSerializer):
+    """
+    Serializer for password change in async views.
+    The caller checks old_password off the event loop.
+    """
+    def validate_old_password(self, value):
+        return value
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh serializer checking the user and the revocation store.
+    Revoked refresh tokens are rejected, and on rotation the old token is revoked:
+    of two concurrent refreshes with the same token only one succeeds.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = get_cached_user(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if refresh.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revoke_token_once(refresh):
+                raise TokenError(_('Token is blacklisted'))
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class RoleTokenVerifySerializer(TokenVerifySerializer):
+    """
+    Token verify serializer that also rejects revoked tokens.
+    """
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        if api_settings.JTI_CLAIM in token and is_token_revoked(token):
+            raise serializers.ValidationError(_('Token is blacklisted'))
+        return {}
@@ -0,0 +1,29 @@
+# Django Built-in modules
+from django.utils.translation import gettext_lazy as _
+
+# Third Party Packages
+from rest_framework import serializers
+
+# Local Apps
+from ..models import Role
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """
+    Filters of the user, user role and role exports (query parameters or command options).
+    since/until bound the creation time: date_joined for users, created otherwise.
+    """
+    role = serializers.CharField(max_length=50, required=False)
+    is_active = serializers.BooleanField(allow_null=True, default=None)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate_role(self, value):
+        if not Role.objects.filter(code=value).exists():
+            raise serializers.ValidationError(_('نقش یافت نشد.'))
+        return value
+
+    def validate(self, attrs):
+        if 'since' in attrs and 'until' in attrs and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError(_('since باید قبل از until باشد.'))
+        return attrs
@@ -1,24 +1,52 @@
 # Django Built-in modules
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.translation import gettext_lazy as _
 
 # Third Party Packages
 from rest_framework import serializers
 
 # Local Apps
+from utils.instrumentation import TimedSerializerMixin
 from ..models import Role, UserRole
 
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Role model.
     """
     class Meta:
         model = Role
-        fields = ('id', 'name', 'code', 'description', 'is_active')
+        fields = ('id', 'name', 'code', 'description', 'is_active', 'parent')
         read_only_fields = ('id',)
 
+    def validate_parent(self, parent):
+        """
+        Reject a parent that would turn the hierarchy into a cycle.
+        """
+        if parent is not None and self.instance is not None and parent.pk in self.instance.get_descendant_ids():
+            raise serializers.ValidationError(_('نقش والد نمی‌تواند خود نقش یا یکی از نقش‌های زیرمجموعه آن باشد.'))
+        return parent
 
-class UserRoleSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        """
+        Reject a new role when every role mask bit is taken.
+        """
+        if self.instance is None:
+            try:
+                Role.get_free_bits(1)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.messages)
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            # Another request took the last free bit
+            raise serializers.ValidationError(e.messages)
+
+
+class UserRoleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for UserRole model.
     """
@@ -35,3 +63,53 @@ class UserRoleSerializer(serializers.ModelSerializer):
         fields = ('id', 'role', 'role_id', 'is_active', 'created')
         read_only_fields = ('id', 'created')
 
+
+
+class UserRolePairSerializer(serializers.Serializer):
+    """
+    Serializer for a single (user_id, role_id) pair of a bulk request.
+    """
+    user_id = serializers.IntegerField(min_value=1)
+    role_id = serializers.IntegerField(min_value=1)
+
+
+class BulkUserRoleSerializer(serializers.Serializer):
+    """
+    Serializer for bulk role assignment / revocation.
+    Accepts either a list of (user_id, role_id) pairs or one role_id with many user_ids.
+    """
+    max_items = 10000
+
+    assignments = UserRolePairSerializer(many=True, required=False)
+    role_id = serializers.IntegerField(min_value=1, required=False)
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+    )
+
+    def validate(self, attrs):
+        """
+        Validate that exactly one input form is used and build the list of unique pairs.
+        """
+        assignments = attrs.get('assignments')
+        role_id = attrs.get('role_id')
+        user_ids = attrs.get('user_ids')
+
+        if assignments is not None and (role_id is not None or user_ids is not None):
+            raise serializers.ValidationError(_('فقط یکی از assignments یا role_id و user_ids را ارسال کنید.'))
+        if assignments is not None:
+            pairs = [(item['user_id'], item['role_id']) for item in assignments]
+        elif role_id is not None and user_ids is not None:
+            pairs = [(user_id, role_id) for user_id in user_ids]
+        else:
+            raise serializers.ValidationError(_('assignments یا role_id و user_ids الزامی است.'))
+
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            raise serializers.ValidationError(_('حداقل یک مورد الزامی است.'))
+        if len(pairs) > self.max_items:
+            raise serializers.ValidationError(
+                _('حداکثر %(count)d مورد در هر درخواست مجاز است.') % {'count': self.max_items}
+            )
+        attrs['pairs'] = pairs
+        return attrs
@@ -1,21 +1,29 @@
 # Django Built-in modules
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 # Third Party Packages
 from rest_framework import serializers
 
 # Local Apps
+from utils.instrumentation import TimedSerializerMixin
+from .auth import UserRegistrationSerializer
 from .roles import RoleSerializer
 from ..models import UserRole
 
 User = get_user_model()
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for user profile with roles.
+    Use setup_eager_loading() on querysets serialized with many=True.
     """
+    active_user_roles_attr = 'active_user_roles'
+
     roles = serializers.SerializerMethodField()
 
     class Meta:
@@ -23,19 +31,69 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'last_login', 'roles')
         read_only_fields = ('id', 'username', 'date_joined', 'last_login', 'roles')
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Prefetch active roles of all users of the queryset in a single query.
+        """
+        return queryset.prefetch_related(Prefetch(
+            'user_roles',
+            queryset=UserRole.objects.filter(is_active=True).select_related('role'),
+            to_attr=cls.active_user_roles_attr,
+        ))
+
     def get_roles(self, obj):
         """
         Get active roles for the user.
         """
-        user_roles = UserRole.objects.filter(user=obj, is_active=True).select_related('role')
+        user_roles = getattr(obj, self.active_user_roles_attr, None)
+        if user_roles is None:
+            user_roles = UserRole.objects.filter(user=obj, is_active=True).select_related('role')
         return RoleSerializer([ur.role for ur in user_roles], many=True).data
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating user profile.
+    Emails are unique regardless of case (migration 0004_user_email_ci_unique); the
+    database constraint catches concurrent updates.
     """
     class Meta:
         model = User
         fields = ('email', 'first_name', 'last_name')
 
+    @classmethod
+    def get_email_conflicts_queryset(cls, email, user_id):
+        """
+        Return the other users having the email, in any case.
+        """
+        return User.objects.alias(email_lower=Lower('email')).filter(email_lower=email.lower()).exclude(pk=user_id)
+
+    def validate_email(self, value):
+        """
+        Check that no other user has the email; empty emails are not unique.
+        """
+        if value and self.get_email_conflicts_queryset(value, self.instance.pk).exists():
+            raise serializers.ValidationError(UserRegistrationSerializer.email_taken_message)
+        return value
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as e:
+            # Lost a race with a concurrent update or registration
+            errors = UserRegistrationSerializer.get_integrity_errors(e)
+            if errors is None:
+                raise
+            raise serializers.ValidationError(errors)
+
+
+class AsyncUserUpdateSerializer(UserUpdateSerializer):
+    """
+    Serializer for updating user profile in async views.
+    Runs no database query: the caller checks email uniqueness with the async ORM.
+    """
+    def validate_email(self, value):
+        return value
+
@@ -0,0 +1,64 @@
+# Django Built-in modules
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+# Local Apps
+from utils.authentication import invalidate_cached_users
+from utils.roles import invalidate_user_roles, invalidate_all_roles, sync_role_masks
+from .models import Role, UserRole
+
+User = get_user_model()
+
+
+# Users whose masks are rewritten once when a role delete has cascaded to their user roles
+ROLE_DELETE_USERS_ATTR = '_role_mask_user_ids'
+
+
+def _deleted_with(origin, model):
+    """
+    True if the delete that sent the signal started from an instance or queryset of model.
+    """
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and issubclass(origin.model, model))
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+def user_role_changed(sender, instance, origin=None, **kwargs):
+    """
+    Rewrite the role mask of the user (same transaction) and drop their cached role codes
+    when one of their roles changes. Cascaded deletes are handled by the deleted parent.
+    """
+    if _deleted_with(origin, Role):
+        if not hasattr(origin, ROLE_DELETE_USERS_ATTR):
+            setattr(origin, ROLE_DELETE_USERS_ATTR, set())
+        getattr(origin, ROLE_DELETE_USERS_ATTR).add(instance.user_id)
+        return
+    if _deleted_with(origin, User):
+        # The mask row is deleted with the user
+        return
+    sync_role_masks(user_id=instance.user_id)
+    transaction.on_commit(lambda: invalidate_user_roles(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=Role)
+def role_changed(sender, instance, origin=None, **kwargs):
+    """
+    Drop cached role codes of all users when a role changes (including soft delete).
+    A deleted role rewrites the masks of its users once, not once per user role.
+    """
+    user_ids = sorted(getattr(origin, ROLE_DELETE_USERS_ATTR, ()))
+    if user_ids:
+        delattr(origin, ROLE_DELETE_USERS_ATTR)
+        for start in range(0, len(user_ids), 1000):
+            sync_role_masks(user_id__in=user_ids[start:start + 1000])
+    transaction.on_commit(invalidate_all_roles)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    Drop cached copies of the user (profile update, password change, deactivation).
+    """
+    transaction.on_commit(lambda: invalidate_cached_users(instance.pk))
@@ -0,0 +1,1083 @@
+# Python Standard Library
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+# Third Party Packages
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# Local Apps
+from utils.admin import EstimatedCountPaginator
+from utils.audit import get_audit_settings, record_events
+from utils.pagination import CreatedCursorPagination
+from utils.throttling import consume, get_bucket_store
+from utils.revocation import BloomFilter, RevocationStore
+from utils.authentication import CachedJWTAuthentication, get_user_cache
+from utils.permissions import HasAnyRole, HasRole
+from utils.roles import get_user_role_mask, sync_role_masks
+from utils.tokens import RevocableRefreshToken
+from .management.commands.import_users import Command as ImportUsersCommand
+from .models import AuditEvent, Role, RoleClosure, UserRole, UserRoleMask
+from .serializers import UserRegistrationSerializer
+
+User = get_user_model()
+
+
+def auth_headers(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RevocableRefreshToken.for_user(user).access_token}'}
+
+
+def disable_periodic_revocation_sync(test_case):
+    """
+    Give the test a revocation store that syncs only on revocations:
+    a periodic sync would add a query to a measured request.
+    """
+    store = RevocationStore(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE, 3600)
+    patcher = patch('utils.revocation._store', store)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+
+
+def create_admin(username='admin'):
+    """
+    Create a user holding the admin role.
+    """
+    role, _created = Role.objects.get_or_create(code='admin', defaults={'name': 'Admin'})
+    admin = User.objects.create_user(username=username, email=f'{username}@test.local', password='Test-Pass-1')
+    UserRole.objects.create(user=admin, role=role)
+    return admin
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class UserListQueryCountTests(TestCase):
+    """
+    The admin user list runs the same number of queries whatever the number of users.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_role = Role.objects.create(name='Admin', code='admin')
+        cls.member_role = Role.objects.create(name='Member', code='member')
+        cls.admin = User.objects.create_user(username='admin', email='admin@test.local', password='Test-Pass-1')
+        UserRole.objects.create(user=cls.admin, role=cls.admin_role)
+
+    def setUp(self):
+        cache.clear()
+        self.headers = auth_headers(self.admin)
+        disable_periodic_revocation_sync(self)
+
+    def add_users(self, total):
+        """
+        Add users with an active role until there are total users.
+        """
+        count = User.objects.count()
+        users = User.objects.bulk_create([
+            User(username=f'user{index}', email=f'user{index}@test.local')
+            for index in range(count, total)
+        ])
+        UserRole.objects.bulk_create([UserRole(user=user, role=self.member_role) for user in users])
+        # bulk_create does not send post_save
+        sync_role_masks(user__username__startswith='user')
+
+    def get_users(self, total):
+        response = self.client.get('/api/users/', {'page_size': 1000}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), total)
+
+    def test_query_count_does_not_depend_on_user_count(self):
+        expected = None
+        for total in (1, 20, 500):
+            with self.subTest(users=total):
+                self.add_users(total)
+                # Fill the authentication and role caches
+                self.get_users(total)
+                if expected is None:
+                    with CaptureQueriesContext(connection) as queries:
+                        self.get_users(total)
+                    expected = len(queries)
+                with self.assertNumQueries(expected):
+                    self.get_users(total)
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'), 'EXPLAIN output is backend specific.')
+class UserRoleIndexTests(TestCase):
+    """
+    Role lookups use the indexes added for them on a seeded, analyzed dataset.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        roles = Role.objects.bulk_create([
+            Role(name=f'role{index}', code=f'role{index}', is_active=index % 10 != 0) for index in range(200)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'user{index}', email=f'user{index}@test.local') for index in range(2000)
+        ])
+        UserRole.objects.bulk_create([
+            UserRole(user=user, role=roles[(index * 7 + offset * 31) % len(roles)], is_active=offset != 0)
+            for index, user in enumerate(users)
+            for offset in range(5)
+        ])
+        cls.user = users[0]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn(index, queryset.explain())
+
+    def test_active_role_listing(self):
+        self.assertUsesIndex(Role.objects.filter(is_active=True)[:20], 'api_role_active_created_idx')
+
+    def test_active_role_by_code(self):
+        # Codes are unique: the lookup needs no partial index of its own
+        plan = Role.objects.filter(code='role5', is_active=True).explain()
+        self.assertRegex(plan, r'api_role_code_\w+|sqlite_autoindex_api_role_\d')
+
+    def test_active_roles_of_user(self):
+        self.assertUsesIndex(
+            UserRole.objects.filter(user=self.user, is_active=True).order_by('-created', '-id'),
+            'api_userrole_user_active_idx',
+        )
+
+    def test_user_role_listing(self):
+        self.assertUsesIndex(UserRole.objects.order_by('-created', '-id')[:20], 'api_userrole_created_idx')
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Cursor pagination pages rows tied on the leading ordering field by the whole ordering tuple.
+    """
+    def walk(self, pagination_class, queryset, page_size=100):
+        """
+        Follow the next links from the first page; return the ids in page order and the last paginator.
+        """
+        factory, ids, cursor = APIRequestFactory(), [], None
+        while True:
+            params = {'page_size': page_size, **({'cursor': cursor} if cursor else {})}
+            paginator = pagination_class()
+            ids += [row.pk for row in paginator.paginate_queryset(queryset, Request(factory.get('/', params)))]
+            link = paginator.get_next_link()
+            if link is None:
+                return ids, paginator
+            cursor = parse_qs(urlparse(link).query)['cursor'][0]
+            self.assertLessEqual(len(ids), queryset.count(), 'next link loops')
+
+    def test_created_ties_beyond_offset_cutoff(self):
+        Role.objects.bulk_create([Role(name=f'role{index}', code=f'role{index}') for index in range(1500)])
+        Role.objects.update(created=timezone.now())
+
+        ids, paginator = self.walk(CreatedCursorPagination, Role.objects.all())
+        self.assertEqual(ids, list(Role.objects.order_by('-id').values_list('id', flat=True)))
+
+        # Back from the last page
+        previous = parse_qs(urlparse(paginator.get_previous_link()).query)['cursor'][0]
+        page = CreatedCursorPagination().paginate_queryset(
+            Role.objects.all(), Request(APIRequestFactory().get('/', {'page_size': 100, 'cursor': previous}))
+        )
+        self.assertEqual([role.pk for role in page], ids[1300:1400])
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'SYNC': True})
+class AuditLogTests(TestCase):
+    """
+    Audit events are written after commit and listed newest first.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+
+    def get_events(self, **params):
+        response = self.client.get('/api/audit/events/', params, **auth_headers(self.admin))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_events_written_on_commit(self):
+        role = Role.objects.create(name='Member', code='member')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/users/{self.admin.pk}/roles/', {'role_id': role.pk},
+                content_type='application/json', **auth_headers(self.admin),
+            )
+        self.assertEqual(response.status_code, 201)
+        event = AuditEvent.objects.get()
+        self.assertEqual(
+            (event.action, event.actor_id, event.target_id),
+            (AuditEvent.Action.USER_ROLE_ASSIGNED, self.admin.pk, self.admin.pk),
+        )
+
+    def test_pages_through_events_of_one_bulk_request(self):
+        # Every event of one call shares occurred_at, like a bulk assignment
+        self.assertTrue(get_audit_settings()['SYNC'])
+        with self.captureOnCommitCallbacks(execute=True):
+            record_events(None, [
+                (AuditEvent.Action.USER_ROLE_ASSIGNED, AuditEvent.TargetType.USER, index, {})
+                for index in range(1500)
+            ], actor=self.admin)
+
+        ids, params = [], {'page_size': 100}
+        while True:
+            data = self.get_events(**params)
+            ids += [event['id'] for event in data['results']]
+            if data['next'] is None:
+                break
+            params['cursor'] = parse_qs(urlparse(data['next']).query)['cursor'][0]
+            self.assertLessEqual(len(ids), 1500, 'next link loops')
+        self.assertEqual(ids, list(AuditEvent.objects.order_by('-id').values_list('id', flat=True)))
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class RoleMaskTests(TestCase):
+    """
+    Role masks follow the user roles and authorize HasRole.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin_role = Role.objects.create(name='Admin', code='admin')
+        self.user = User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+
+    def get_mask(self, user):
+        return UserRoleMask.objects.get(user=user).mask
+
+    def test_mask_follows_user_roles(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user_role = UserRole.objects.create(user=self.user, role=self.admin_role)
+        self.assertEqual(self.get_mask(self.user), 1 << self.admin_role.bit)
+        self.assertEqual(self.client.get('/api/roles/', **auth_headers(self.user)).status_code, 200)
+
+        # Cached masks are dropped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            user_role.delete()
+        self.assertEqual(self.get_mask(self.user), 0)
+        self.assertEqual(self.client.get('/api/roles/', **auth_headers(self.user)).status_code, 403)
+
+    def test_role_delete_rewrites_masks_once(self):
+        role = Role.objects.create(name='Member', code='member')
+        users = [
+            User.objects.create_user(username=f'user{index}', email=f'user{index}@test.local')
+            for index in range(20)
+        ]
+        for user in users:
+            UserRole.objects.create(user=user, role=role)
+
+        with CaptureQueriesContext(connection) as queries:
+            role.delete()
+        upserts = [query for query in queries if query['sql'].startswith('INSERT INTO "api_userrolemask"')]
+        self.assertEqual(len(upserts), 1)
+        self.assertEqual(set(UserRoleMask.objects.filter(user__in=users).values_list('mask', flat=True)), {0})
+
+    def test_sync_user_filters(self):
+        UserRole.objects.create(user=self.user, role=self.admin_role)
+        UserRoleMask.objects.filter(user=self.user).update(mask=0)
+        for user_filter in ({'user': self.user}, {'user__in': [self.user]}, {'user__username': 'member'}):
+            with self.subTest(**user_filter):
+                self.assertEqual(sync_role_masks(**user_filter), 1)
+                self.assertEqual(self.get_mask(self.user), 1 << self.admin_role.bit)
+
+    @skipUnless(connection.features.has_select_for_update, 'The backend cannot lock rows.')
+    def test_sync_locks_the_user_first(self):
+        with CaptureQueriesContext(connection) as queries:
+            sync_role_masks(user_id=self.user.pk)
+        self.assertIn('FOR UPDATE', queries[0]['sql'])
+
+
+class ExportTests(TestCase):
+    """
+    Exports stream their rows, as an async iterator under ASGI.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        Role.objects.bulk_create([Role(name=f'role{index}', code=f'role{index}') for index in range(50)])
+        Role.objects.filter(code='role0').update(is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_wsgi_streams_filtered_rows(self):
+        response = self.client.get('/api/export/roles.ndjson', {'is_active': 'false'}, **auth_headers(self.admin))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['code'] for row in rows], ['role0'])
+
+    async def test_asgi_streams_async_iterator(self):
+        token = await sync_to_async(RevocableRefreshToken.for_user)(self.admin)
+        response = await self.async_client.get(
+            '/api/export/roles.csv', headers={'Authorization': f'Bearer {token.access_token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        # A sync iterator would be read into a list by the ASGI handler
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(body.splitlines()), 1 + await Role.objects.acount())
+
+
+class AsyncAuthenticationTests(TestCase):
+    """
+    The async authentication endpoints answer like the sync ones.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+
+    def setUp(self):
+        cache.clear()
+        get_bucket_store().clear()
+
+    async def login(self, password='Test-Pass-1'):
+        return await self.async_client.post(
+            '/api/auth/async/login/', {'username': 'member', 'password': password}, content_type='application/json'
+        )
+
+    async def test_login_returns_tokens(self):
+        response = await self.login()
+        self.assertEqual(response.status_code, 200)
+        access = json.loads(response.content)['tokens']['access']
+        profile = await self.async_client.get('/api/auth/async/profile/', headers={'Authorization': f'Bearer {access}'})
+        self.assertEqual(json.loads(profile.content)['username'], 'member')
+
+    async def test_inactive_user_gets_invalid_credentials(self):
+        await User.objects.filter(pk=self.user.pk).aupdate(is_active=False)
+        response = await self.login()
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    async def test_login_throttled_through_the_cache(self):
+        with patch('utils.throttling._store', None):
+            statuses = [(await self.login('wrong')).status_code for _attempt in range(6)]
+        self.assertEqual(statuses, [401] * 5 + [429])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Safe reads go to the replica, except for clients that just wrote.
+    The replica is a separate database here, so rows tell where a read went.
+    """
+    # Reads inside a transaction stay on the primary: no TestCase wrapping
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        User.objects.db_manager('replica1').create_user(username='replica', email='replica@test.local')
+
+    def list_usernames(self, user):
+        response = self.client.get('/api/users/', **auth_headers(user))
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.data['results']]
+
+    def test_unpinned_reads_use_the_replica(self):
+        # The admin exists on the primary only: authentication reads the primary
+        self.assertEqual(self.list_usernames(self.admin), ['replica'])
+
+    def test_writer_reads_the_primary(self):
+        role = Role.objects.create(name='Member', code='member')
+        response = self.client.post(
+            f'/api/users/{self.admin.pk}/roles/', {'role_id': role.pk},
+            content_type='application/json', **auth_headers(self.admin),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.list_usernames(self.admin), ['admin'])
+
+        # Other clients are not pinned
+        self.assertEqual(self.list_usernames(create_admin('other')), ['replica'])
+
+    def test_role_list_cache_filled_from_the_primary(self):
+        # bulk_create: Role.save would write the closure rows to the primary
+        Role.objects.using('replica1').bulk_create([Role(name='Replica', code='replica')])
+        response = self.client.get('/api/roles/', **auth_headers(self.admin))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([role['code'] for role in json.loads(response.content)['results']], ['admin'])
+
+    def test_token_decoded_once(self):
+        with patch.object(
+            JWTAuthentication, 'get_validated_token', autospec=True, side_effect=JWTAuthentication.get_validated_token,
+        ) as get_validated_token:
+            self.list_usernames(self.admin)
+        self.assertEqual(get_validated_token.call_count, 1)
+
+
+class RequestInstrumentationTests(TestCase):
+    """
+    Request instrumentation is off unless enabled, and then times and logs requests.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+
+    def test_off_by_default_in_tests(self):
+        response = self.client.get('/api/users/', **auth_headers(self.admin))
+        self.assertNotIn('Server-Timing', response.headers)
+
+    @override_settings(REQUEST_INSTRUMENTATION={**settings.REQUEST_INSTRUMENTATION, 'ENABLED': True, 'MAX_QUERIES': 0})
+    def test_enabled_times_and_logs_requests(self):
+        with self.assertLogs('utils.instrumentation', 'WARNING'):
+            response = self.client.get('/api/users/', **auth_headers(self.admin))
+        self.assertIn('db;', response.headers['Server-Timing'])
+
+
+class SeedCommandTests(TestCase):
+    """
+    The seed command makes the same rows for the same seed, in development only.
+    """
+    def seed(self, prefix, chunk_size):
+        call_command(
+            'seed', users=30, roles=6, roles_per_user=3, seed=7, prefix=prefix,
+            chunk_size=chunk_size, workers=1, stdout=StringIO(),
+        )
+        users = User.objects.filter(username__startswith=prefix).order_by('username')
+        return [
+            (
+                user.first_name, user.last_name,
+                sorted(user_role.role.code.removeprefix(prefix) for user_role in user.user_roles.all()),
+            )
+            for user in users.prefetch_related('user_roles__role')
+        ]
+
+    @override_settings(DEBUG=True)
+    def test_chunk_size_does_not_change_rows(self):
+        rows = self.seed('a_', chunk_size=30)
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(self.seed('b_', chunk_size=7), rows)
+
+    def test_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('seed', users=1, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+
+
+class RevocationTests(TestCase):
+    """
+    Revoked tokens are rejected; the Bloom filter in front of them has no false negatives.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+
+    def setUp(self):
+        cache.clear()
+        get_bucket_store().clear()
+
+    def refresh(self, refresh):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)}, content_type='application/json')
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, 0.001)
+        for index in range(1000):
+            bloom.add(f'revoked{index}')
+        self.assertTrue(all(f'revoked{index}' in bloom for index in range(1000)))
+        false_positives = sum(f'live{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 100)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        refresh = RevocableRefreshToken.for_user(self.user)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/auth/logout/', {'refresh': str(refresh)}, content_type='application/json', **headers
+            )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/auth/profile/', **headers).status_code, 401)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_rotated_refresh_token_is_revoked(self):
+        refresh = RevocableRefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+
+class ThrottlingTests(TestCase):
+    """
+    GCRA buckets admit a burst of the rate, then one request per interval.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+
+    def setUp(self):
+        get_bucket_store().clear()
+
+    def test_burst_then_interval(self):
+        # login_username: 5/min, one token every 12 s
+        self.assertEqual([consume('login_username', 'bucket', now=1000) for _attempt in range(5)], [0] * 5)
+        self.assertEqual(consume('login_username', 'bucket', now=1000), 12)
+        self.assertEqual(consume('login_username', 'bucket', now=1006), 6)
+        self.assertEqual(consume('login_username', 'bucket', now=1012), 0)
+        self.assertEqual(consume('login_username', 'bucket', now=1012), 12)
+        # Other identities have their own bucket
+        self.assertEqual(consume('login_username', 'other', now=1012), 0)
+
+    def test_login_throttled_per_username(self):
+        statuses = [
+            self.client.post(
+                '/api/auth/login/', {'username': username, 'password': 'wrong'}, content_type='application/json'
+            )
+            for username in ('member', 'Member', 'member ', 'MEMBER', 'member', 'member')
+        ]
+        self.assertEqual([response.status_code for response in statuses], [401] * 5 + [429])
+        # One token every 12 s, minus the time taken by the failed logins
+        self.assertIn(int(statuses[-1].headers['Retry-After']), range(1, 13))
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class BulkUserRoleTests(TestCase):
+    """
+    Bulk assignment and revocation report a result per pair in a bounded number of queries.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin()
+        cls.role = Role.objects.create(name='Member', code='member')
+        cls.users = User.objects.bulk_create([
+            User(username=f'user{index}', email=f'user{index}@test.local') for index in range(111)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, action, data):
+        response = self.client.post(
+            f'/api/users/roles/bulk-{action}/', data, content_type='application/json', **auth_headers(self.admin)
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def masks(self, users):
+        return set(UserRoleMask.objects.filter(user__in=users).values_list('mask', flat=True))
+
+    def test_assign_results(self):
+        active, inactive, new = self.users[:3]
+        UserRole.objects.create(user=active, role=self.role)
+        UserRole.objects.create(user=inactive, role=self.role, is_active=False)
+        missing_user_id = max(user.pk for user in self.users) + 1
+
+        results = self.post('assign', {'assignments': [
+            {'user_id': active.pk, 'role_id': self.role.pk},
+            {'user_id': inactive.pk, 'role_id': self.role.pk},
+            {'user_id': new.pk, 'role_id': self.role.pk},
+            {'user_id': missing_user_id, 'role_id': self.role.pk},
+            {'user_id': new.pk, 'role_id': self.role.pk + 1000},
+        ]})
+        self.assertEqual(results, {
+            f'{active.pk}:{self.role.pk}': 'unchanged',
+            f'{inactive.pk}:{self.role.pk}': 'reactivated',
+            f'{new.pk}:{self.role.pk}': 'created',
+            f'{missing_user_id}:{self.role.pk}': 'user_not_found',
+            f'{new.pk}:{self.role.pk + 1000}': 'role_not_found',
+        })
+        self.assertEqual(self.masks([inactive, new]), {1 << self.role.bit})
+
+    def test_query_count_does_not_depend_on_pair_count(self):
+        # Fill the authentication and role caches
+        self.post('assign', {'role_id': self.role.pk, 'user_ids': [self.users[0].pk]})
+        with CaptureQueriesContext(connection) as queries:
+            self.post('assign', {'role_id': self.role.pk, 'user_ids': [user.pk for user in self.users[1:11]]})
+        # 100 rows: one INSERT batch on every backend (SQLite limits the parameters per query)
+        with self.assertNumQueries(len(queries)):
+            self.post('assign', {'role_id': self.role.pk, 'user_ids': [user.pk for user in self.users[11:111]]})
+
+    def test_revoke_results(self):
+        assigned, suspended, unassigned = self.users[:3]
+        UserRole.objects.create(user=assigned, role=self.role)
+        UserRole.objects.create(user=suspended, role=self.role, is_active=False, suspended_by_role=True)
+
+        results = self.post('revoke', {
+            'role_id': self.role.pk, 'user_ids': [assigned.pk, suspended.pk, unassigned.pk],
+        })
+        self.assertEqual(results, {
+            f'{assigned.pk}:{self.role.pk}': 'revoked',
+            f'{suspended.pk}:{self.role.pk}': 'revoked',
+            f'{unassigned.pk}:{self.role.pk}': 'not_assigned',
+        })
+        self.assertFalse(UserRole.objects.filter(role=self.role).filter(
+            Q(is_active=True) | Q(suspended_by_role=True)
+        ).exists())
+        self.assertEqual(self.masks([assigned]), {0})
+
+    def test_one_input_form(self):
+        response = self.client.post(
+            '/api/users/roles/bulk-assign/',
+            {'role_id': self.role.pk, 'user_ids': [self.users[0].pk], 'assignments': []},
+            content_type='application/json', **auth_headers(self.admin),
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class ConditionalRequestTests(TestCase):
+    """
+    ETag validators: 304 for a current client copy, 412 for an update of a stale one.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.headers = auth_headers(self.admin)
+
+    def test_role_list_not_modified_until_a_role_changes(self):
+        etag = self.client.get('/api/roles/', **self.headers)['ETag']
+        response = self.client.get('/api/roles/', HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Role.objects.create(name='Member', code='member')
+        response = self.client.get('/api/roles/', HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_role_update_requires_current_etag(self):
+        role = Role.objects.create(name='Member', code='member')
+        etag = self.client.get(f'/api/roles/{role.pk}/', **self.headers)['ETag']
+        Role.objects.filter(pk=role.pk).update(updated=timezone.now())
+
+        response = self.client.patch(
+            f'/api/roles/{role.pk}/', {'name': 'Stale'}, content_type='application/json',
+            HTTP_IF_MATCH=etag, **self.headers,
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Role.objects.get(pk=role.pk).name, 'Member')
+
+        etag = self.client.get(f'/api/roles/{role.pk}/', **self.headers)['ETag']
+        response = self.client.patch(
+            f'/api/roles/{role.pk}/', {'name': 'Current'}, content_type='application/json',
+            HTTP_IF_MATCH=etag, **self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def get_profile(self, **headers):
+        return self.client.get('/api/auth/profile/', **headers, **self.headers)
+
+    def test_profile_validators(self):
+        etag = self.get_profile()['ETag']
+        self.assertEqual(self.get_profile(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.patch(
+            '/api/auth/profile/', {'first_name': 'Sara'}, content_type='application/json',
+            HTTP_IF_MATCH='"stale"', **self.headers,
+        )
+        self.assertEqual(response.status_code, 412)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                '/api/auth/profile/', {'first_name': 'Sara'}, content_type='application/json',
+                HTTP_IF_MATCH=etag, **self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_profile(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class RoleHierarchyTests(TestCase):
+    """
+    The closure table follows parent changes; a role implies the roles of its ancestors.
+    """
+    def setUp(self):
+        cache.clear()
+        self.root = Role.objects.create(name='Root', code='root')
+        self.middle = Role.objects.create(name='Middle', code='middle', parent=self.root)
+        self.leaf = Role.objects.create(name='Leaf', code='leaf', parent=self.middle)
+
+    def links(self):
+        return set(RoleClosure.objects.values_list('ancestor__code', 'descendant__code', 'depth'))
+
+    def test_closure_follows_parent_changes(self):
+        own = {('root', 'root', 0), ('middle', 'middle', 0), ('leaf', 'leaf', 0)}
+        self.assertEqual(self.links(), own | {('root', 'middle', 1), ('middle', 'leaf', 1), ('root', 'leaf', 2)})
+
+        # The subtree moves with its root
+        self.middle.parent = None
+        self.middle.save()
+        self.assertEqual(self.links(), own | {('middle', 'leaf', 1)})
+
+        other = Role.objects.create(name='Other', code='other')
+        self.middle.parent = other
+        self.middle.save()
+        self.assertEqual(self.links(), own | {
+            ('other', 'other', 0), ('other', 'middle', 1), ('middle', 'leaf', 1), ('other', 'leaf', 2),
+        })
+
+    def test_cycles_rejected(self):
+        self.root.parent = self.leaf
+        with self.assertRaises(ValidationError):
+            self.root.full_clean()
+
+    def test_has_role_inherited_from_ancestors(self):
+        admin_role = Role.objects.create(name='Admin', code='admin')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.root.parent = admin_role
+            self.root.save()
+        user = User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.create(user=user, role=self.leaf)
+        self.assertEqual(self.client.get('/api/roles/', **auth_headers(user)).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.middle.parent = None
+            self.middle.save()
+        self.assertEqual(self.client.get('/api/roles/', **auth_headers(user)).status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(TestCase):
+    """
+    import_users resumes a failed import after the last committed batch.
+    """
+    def setUp(self):
+        cache.clear()
+        Role.objects.create(name='Customer', code='customer', bit=0)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'users.ndjson')
+        rows = [
+            {'username': f'customer{index}', 'email': f'customer{index}@test.local', 'password': 'Import-Pass-1'}
+            for index in range(9)
+        ]
+        rows[4]['email'] = 'not-an-email'
+        with open(self.path, 'w') as file:
+            file.writelines(json.dumps(row) + '\n' for row in rows)
+
+    def import_users(self):
+        call_command('import_users', self.path, batch_size=3, workers=1, role=['customer'], stdout=StringIO())
+
+    def test_resume_after_failed_batch(self):
+        create_users = ImportUsersCommand.create_users
+        calls = []
+
+        def fail_second_batch(command, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return create_users(command, *args)
+
+        with patch.object(ImportUsersCommand, 'create_users', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_users()
+        self.assertEqual(User.objects.count(), 3)
+        with open(f'{self.path}.checkpoint') as file:
+            self.assertEqual(json.load(file)['row'], 3)
+
+        self.import_users()
+        self.assertEqual(
+            list(User.objects.order_by('username').values_list('username', flat=True)),
+            [f'customer{index}' for index in range(9) if index != 4],
+        )
+        self.assertEqual(UserRole.objects.filter(role__code='customer').count(), 8)
+        self.assertEqual(set(UserRoleMask.objects.values_list('mask', flat=True)), {1})
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+        with open(f'{self.path}.errors.ndjson') as file:
+            self.assertEqual([json.loads(line)['row'] for line in file], [5])
+
+
+class RoleCheckCacheTests(TestCase):
+    """
+    Role checks read the role mask once per request and not at all once it is cached.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+
+    def check_roles(self):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = self.admin
+        return [
+            HasRole('admin').has_permission(request, None),
+            HasAnyRole(['staff', 'admin']).has_permission(request, None),
+            HasRole('staff').has_permission(request, None),
+        ]
+
+    def test_role_checks_cached(self):
+        with patch('utils.roles.get_user_role_mask', wraps=get_user_role_mask) as load_mask:
+            self.assertEqual(self.check_roles(), [True, True, False])
+        self.assertEqual(load_mask.call_count, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.check_roles(), [True, True, False])
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    Authenticated users come from the user cache until the user row changes.
+    """
+    def setUp(self):
+        cache.clear()
+        get_user_cache().clear()
+        disable_periodic_revocation_sync(self)
+        self.user = User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+        self.headers = auth_headers(self.user)
+
+    def authenticate(self):
+        return CachedJWTAuthentication().authenticate(Request(APIRequestFactory().get('/', **self.headers)))
+
+    def test_user_cached_until_saved(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, _token = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_password_change_rejects_old_tokens(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('Other-Pass-2')
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class StatelessLoginTests(TestCase):
+    """
+    Stateless login issues tokens without a session and coalesces last_login updates.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='member', email='member@test.local', password='Test-Pass-1')
+
+    def setUp(self):
+        cache.clear()
+        get_bucket_store().clear()
+
+    def login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'member', 'password': 'Test-Pass-1'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    @override_settings(AUTH_STATELESS_LOGIN=True)
+    def test_no_session_and_one_last_login_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+            self.login()
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertFalse(any('django_session' in query['sql'] for query in queries))
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "auth_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIsNotNone(User.objects.get(pk=self.user.pk).last_login)
+
+    @override_settings(AUTH_STATELESS_LOGIN=False)
+    def test_session_login(self):
+        self.assertIn(settings.SESSION_COOKIE_NAME, self.login().cookies)
+
+
+class RegistrationTests(TestCase):
+    """
+    Registration checks username and email (case-insensitive) with one query;
+    the unique indexes catch concurrent registrations.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username='member', email='Member@Test.local', password='Test-Pass-1')
+
+    def setUp(self):
+        get_bucket_store().clear()
+
+    def register(self, username, email):
+        return self.client.post('/api/auth/register/', {
+            'username': username, 'email': email, 'password': 'New-Pass-1234', 'password_confirm': 'New-Pass-1234',
+        }, content_type='application/json')
+
+    def test_conflicts_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register('member', 'member@test.LOCAL')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {'username', 'email'})
+        self.assertEqual(len(queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register('other', 'other@test.local')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('SELECT')]), 1)
+
+    def test_concurrent_registration_reported_as_field_error(self):
+        # A registration committed between the check and the insert
+        with patch.object(UserRegistrationSerializer, 'get_conflicts_queryset', return_value=[]):
+            response = self.register('other', 'MEMBER@test.local')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {'email'})
+
+
+class RoleCatalogResponseCacheTests(TestCase):
+    """
+    Role list pages are rendered and compressed once, then served from the cache until a role changes.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.headers = auth_headers(self.admin)
+
+    def get_roles(self, **headers):
+        response = self.client.get('/api/roles/', **headers, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_served_from_cache_until_a_role_changes(self):
+        body = self.get_roles().content
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_roles().content, body)
+        self.assertFalse(any('FROM "api_role"' in query['sql'] for query in queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Role.objects.create(name='Member', code='member')
+        self.assertNotEqual(self.get_roles().content, body)
+
+    def test_compressed_copies(self):
+        body = self.get_roles().content
+        response = self.get_roles(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+
+@override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ENABLED': False})
+class RoleSoftDeleteTests(TestCase):
+    """
+    Deactivating a role suspends its user roles with set-based updates; activating restores them.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.role = Role.objects.create(name='Member', code='member')
+
+    def add_users(self, count, start=0):
+        users = User.objects.bulk_create([
+            User(username=f'user{index}', email=f'user{index}@test.local') for index in range(start, start + count)
+        ])
+        UserRole.objects.bulk_create([UserRole(user=user, role=self.role) for user in users])
+        sync_role_masks(user__in=users)
+        return users
+
+    def delete_role(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/roles/{self.role.pk}/', **auth_headers(self.admin))
+        self.assertEqual(response.status_code, 204)
+
+    def test_deactivate_and_restore(self):
+        users = self.add_users(3)
+        # Revoked while the role is inactive: not restored with it
+        self.delete_role()
+        self.assertEqual(UserRole.objects.filter(role=self.role, suspended_by_role=True).count(), 3)
+        self.assertEqual(set(UserRoleMask.objects.filter(user__in=users).values_list('mask', flat=True)), {0})
+        UserRole.objects.filter(user=users[0], role=self.role).update(suspended_by_role=False)
+
+        self.role.refresh_from_db()
+        self.role.set_active(True)
+        self.assertEqual(
+            set(UserRole.objects.filter(role=self.role, is_active=True).values_list('user_id', flat=True)),
+            {users[1].pk, users[2].pk},
+        )
+        self.assertEqual(UserRoleMask.objects.get(user=users[1]).mask, 1 << self.role.bit)
+        self.assertEqual(UserRoleMask.objects.get(user=users[0]).mask, 0)
+
+    def test_query_count_does_not_depend_on_user_count(self):
+        self.add_users(5)
+        with CaptureQueriesContext(connection) as queries:
+            self.role.set_active(False)
+        self.role.set_active(True)
+        self.add_users(200, start=5)
+        with self.assertNumQueries(len(queries)):
+            self.role.set_active(False)
+
+
+class AdminChangelistTests(TestCase):
+    """
+    Changelists of the large role tables run the same queries whatever the number of rows.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(username='root', email='root@test.local', password='Test-Pass-1')
+        cls.role = Role.objects.create(name='Member', code='member')
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def add_user_roles(self, count, start=0):
+        users = User.objects.bulk_create([
+            User(username=f'user{index}', email=f'user{index}@test.local') for index in range(start, start + count)
+        ])
+        UserRole.objects.bulk_create([UserRole(user=user, role=self.role) for user in users])
+
+    def test_user_role_changelist_query_count(self):
+        self.add_user_roles(5)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/admin/api/userrole/').status_code, 200)
+        self.add_user_roles(95, start=5)
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(self.client.get('/admin/api/userrole/').status_code, 200)
+
+    def test_user_role_search(self):
+        self.add_user_roles(3)
+        response = self.client.get('/admin/api/userrole/', {'q': 'user1'})
+        self.assertEqual([user_role.user.username for user_role in response.context['cl'].result_list], ['user1'])
+
+    def test_estimated_count(self):
+        queryset = UserRole.objects.order_by('pk')
+        with patch.object(EstimatedCountPaginator, 'estimate_count', return_value=50000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 50000)
+        # Small estimates are counted exactly
+        self.add_user_roles(3)
+        with patch.object(EstimatedCountPaginator, 'estimate_count', return_value=10):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 3)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchApiCommandTests(TestCase):
+    """
+    bench_api measures every endpoint without errors, leaves no rows behind and flags regressions.
+    """
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'bench.json')
+
+    def bench(self, **options):
+        call_command('bench_api', users=5, roles=2, iterations=2, warmup=0, stdout=StringIO(), **options)
+
+    def test_run_and_compare(self):
+        self.bench(output=self.output)
+        with open(self.output) as file:
+            results = json.load(file)
+        self.assertTrue(results['endpoints'])
+        self.assertEqual([name for name, summary in results['endpoints'].items() if summary['errors']], [])
+        self.assertFalse(User.objects.exists())
+
+        # A previous run with one query less per request on every endpoint
+        for summary in results['endpoints'].values():
+            summary['queries'] -= 1
+        with open(self.output, 'w') as file:
+            json.dump(results, file)
+        with self.assertRaises(CommandError):
+            self.bench(compare=self.output, fail_on_regression=True)
@@ -2,7 +2,7 @@
 from django.urls import path, include
 
 # Local Apps
-from . import  auth_urls, role_urls
+from . import  auth_urls, async_auth_urls, role_urls, user_urls, metrics_urls, audit_urls, export_urls
 
 app_name = 'api'
 
@@ -10,8 +10,23 @@ urlpatterns = [
   
     # Authentication endpoints
     path('auth/', include(auth_urls)),
+
+    # Async authentication endpoints (ASGI)
+    path('auth/async/', include(async_auth_urls)),
     
     # Role Management endpoints
     path('', include(role_urls)),
+
+    # User Management endpoints
+    path('', include(user_urls)),
+
+    # Monitoring endpoints
+    path('', include(metrics_urls)),
+
+    # Audit log endpoints
+    path('', include(audit_urls)),
+
+    # Export endpoints
+    path('', include(export_urls)),
 ]
 
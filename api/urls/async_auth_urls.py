@@ -0,0 +1,20 @@
+# Django Built-in modules
+from django.urls import path
+
+# Local Apps
+from ..views import (
+    user_register_async,
+    user_login_async,
+    user_logout_async,
+    user_profile_async,
+    password_change_async,
+)
+
+urlpatterns = [
+    # Native async authentication endpoints (ASGI)
+    path('register/', user_register_async, name='user_register_async'),
+    path('login/', user_login_async, name='user_login_async'),
+    path('logout/', user_logout_async, name='user_logout_async'),
+    path('profile/', user_profile_async, name='user_profile_async'),
+    path('password/change/', password_change_async, name='password_change_async'),
+]
@@ -0,0 +1,10 @@
+# Django Built-in modules
+from django.urls import path
+
+# Local Apps
+from ..views import AuditEventListView
+
+urlpatterns = [
+    # Audit log endpoints
+    path('audit/events/', AuditEventListView.as_view(), name='audit_event_list'),
+]
@@ -5,6 +5,7 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
 # Local Apps
+from utils.throttling import TokenRefreshIPThrottle
 from ..views import (
     user_register,
     user_login,
@@ -21,7 +22,7 @@ urlpatterns = [
     path('password/change/', password_change, name='password_change'),
     
     # JWT Token endpoints
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(throttle_classes=[TokenRefreshIPThrottle]), name='token_refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
 ]
 
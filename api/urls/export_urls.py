@@ -0,0 +1,10 @@
+# Django Built-in modules
+from django.urls import path
+
+# Local Apps
+from ..views import ExportView
+
+urlpatterns = [
+    # Export endpoints, e.g. export/users.ndjson, export/user-roles.csv
+    path('export/<slug:dataset>.<slug:file_format>', ExportView.as_view(), name='export'),
+]
@@ -0,0 +1,10 @@
+# Django Built-in modules
+from django.urls import path
+
+# Local Apps
+from ..views import metrics
+
+urlpatterns = [
+    # Monitoring endpoints
+    path('metrics/', metrics, name='metrics'),
+]
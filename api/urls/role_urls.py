@@ -7,6 +7,8 @@ from ..views import (
     RoleDetailViewSet,
     user_role_list,
     user_role_remove,
+    user_role_bulk_assign,
+    user_role_bulk_revoke,
 )
 
 urlpatterns = [
@@ -15,5 +17,7 @@ urlpatterns = [
     path('roles/<int:pk>/', RoleDetailViewSet.as_view(), name='role_detail'),
     path('users/<int:user_id>/roles/', user_role_list, name='user_role_list'),
     path('users/<int:user_id>/roles/<int:role_id>/', user_role_remove, name='user_role_remove'),
+    path('users/roles/bulk-assign/', user_role_bulk_assign, name='user_role_bulk_assign'),
+    path('users/roles/bulk-revoke/', user_role_bulk_revoke, name='user_role_bulk_revoke'),
 ]
 
@@ -0,0 +1,10 @@
+# Django Built-in modules
+from django.urls import path
+
+# Local Apps
+from ..views import UserListViewSet
+
+urlpatterns = [
+    # User Management endpoints
+    path('users/', UserListViewSet.as_view(), name='user_list'),
+]
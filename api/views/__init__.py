@@ -9,12 +9,25 @@ from .authentication import (
     UserProfileView,
     password_change,
 )
+from .async_authentication import (
+    user_register_async,
+    user_login_async,
+    user_logout_async,
+    user_profile_async,
+    password_change_async,
+)
 from .roles import (
     RoleListViewSet,
     RoleDetailViewSet,
     user_role_list,
     user_role_remove,
+    user_role_bulk_assign,
+    user_role_bulk_revoke,
 )
+from .users import UserListViewSet
+from .metrics import metrics
+from .audit import AuditEventListView
+from .export import ExportView
 
 User = get_user_model()
 
@@ -24,9 +37,20 @@ __all__ = [
     'user_logout',
     'UserProfileView',
     'password_change',
+    'user_register_async',
+    'user_login_async',
+    'user_logout_async',
+    'user_profile_async',
+    'password_change_async',
     'RoleListViewSet',
     'RoleDetailViewSet',
     'user_role_list',
     'user_role_remove',
+    'user_role_bulk_assign',
+    'user_role_bulk_revoke',
+    'UserListViewSet',
+    'metrics',
+    'AuditEventListView',
+    'ExportView',
 ]
 
@@ -0,0 +1,350 @@
+# Python Standard Library
+import json
+import math
+
+# Django Built-in modules
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.translation import gettext_lazy as _
+
+# Third Party Packages
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, Throttled
+from rest_framework_simplejwt.exceptions import TokenError
+
+# Local Apps
+from utils.audit import record_event
+from utils.authentication import aauthenticate_jwt, aupdate_last_login
+from utils.hashing import acheck_password, amake_password
+from utils.revocation import revoke_tokens
+from utils.throttling import consume, get_client_ident, normalize_username
+from utils.tokens import RevocableRefreshToken, decode_user_refresh_token
+from ..models import AuditEvent, UserRole
+from ..serializers import (
+    AsyncUserRegistrationSerializer,
+    UserLoginSerializer,
+    UserProfileSerializer,
+    AsyncUserUpdateSerializer,
+    AsyncPasswordChangeSerializer,
+)
+
+User = get_user_model()
+
+# Native async versions of the views in authentication.py, for ASGI deployments.
+# They use the async ORM and hash passwords on a bounded executor (utils/hashing.py).
+# They are JWT only: no session is created or flushed. Request bodies must be JSON.
+
+
+def _json_response(data, status_code):
+    return JsonResponse(
+        data,
+        status=status_code,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def _parse_body(request):
+    """
+    Return the JSON body of the request as a dict, or None if it is not valid JSON.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _invalid_body_response():
+    return _json_response({
+        'status': 'error',
+        'message': _('بدنه درخواست باید JSON معتبر باشد.')
+    }, status.HTTP_400_BAD_REQUEST)
+
+
+def _consume_all(buckets):
+    return max(consume(scope, ident) for scope, ident in buckets)
+
+
+async def _throttle(*buckets):
+    """
+    Take a token from every (scope, ident) bucket; return a 429 response if any is empty.
+    Uses the same buckets as the throttle classes of the sync views. The buckets may live
+    in the cache (THROTTLE_BACKEND), so they are taken off the event loop.
+    """
+    wait = await sync_to_async(_consume_all)(buckets)
+    if not wait:
+        return None
+    response = _json_response({'detail': Throttled(wait).detail}, status.HTTP_429_TOO_MANY_REQUESTS)
+    response.headers['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+async def _authenticate(request):
+    """
+    Return (user, validated_token, None) for a valid access token, or (None, None, error_response).
+    """
+    try:
+        result = await aauthenticate_jwt(request)
+    except AuthenticationFailed as e:
+        return None, None, _json_response({'detail': e.detail}, status.HTTP_401_UNAUTHORIZED)
+    if result is None:
+        return None, None, _json_response(
+            {'detail': NotAuthenticated.default_detail}, status.HTTP_401_UNAUTHORIZED
+        )
+    return result[0], result[1], None
+
+
+async def user_register_async(request):
+    """
+    Async user registration endpoint.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    throttled = await _throttle(('register_ip', get_client_ident(request)))
+    if throttled:
+        return throttled
+    data = _parse_body(request)
+    if data is None:
+        return _invalid_body_response()
+
+    serializer = AsyncUserRegistrationSerializer(data=data)
+    if not serializer.is_valid():
+        return _json_response({
+            'status': 'error',
+            'errors': serializer.errors
+        }, status.HTTP_400_BAD_REQUEST)
+
+    validated_data = serializer.validated_data
+    username, email = validated_data['username'], validated_data['email']
+    conflicts = [
+        conflict
+        async for conflict in AsyncUserRegistrationSerializer.get_conflicts_queryset(username, email)
+    ]
+    errors = AsyncUserRegistrationSerializer.get_unique_errors(username, email, conflicts)
+    if errors:
+        return _json_response({
+            'status': 'error',
+            'errors': errors
+        }, status.HTTP_400_BAD_REQUEST)
+
+    user = User(
+        username=User.normalize_username(username),
+        email=User.objects.normalize_email(email),
+        first_name=validated_data.get('first_name', ''),
+        last_name=validated_data.get('last_name', ''),
+    )
+    user.password = await amake_password(validated_data['password'])
+    try:
+        await user.asave()
+    except IntegrityError as e:
+        # Lost a race with a concurrent registration
+        errors = AsyncUserRegistrationSerializer.get_integrity_errors(e)
+        if errors is None:
+            raise
+        return _json_response({
+            'status': 'error',
+            'errors': errors
+        }, status.HTTP_400_BAD_REQUEST)
+
+    return _json_response({
+        'status': 'success',
+        'message': _('کاربر با موفقیت ثبت نام شد.'),
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+        }
+    }, status.HTTP_201_CREATED)
+
+
+async def user_login_async(request):
+    """
+    Async user login endpoint with JWT token generation.
+    last_login updates are coalesced like the stateless mode of user_login.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    data = _parse_body(request)
+    if data is None:
+        return _invalid_body_response()
+    throttled = await _throttle(
+        ('login_ip', get_client_ident(request)),
+        ('login_username', normalize_username(data.get('username'))),
+    )
+    if throttled:
+        return throttled
+
+    serializer = UserLoginSerializer(data=data)
+    if not serializer.is_valid():
+        return _json_response({
+            'status': 'error',
+            'errors': serializer.errors
+        }, status.HTTP_400_BAD_REQUEST)
+
+    username = serializer.validated_data['username']
+    password = serializer.validated_data['password']
+    user = await User.objects.filter(**{User.USERNAME_FIELD: username}).afirst()
+    if user is None:
+        # Run the hasher once to reduce the timing difference with existing users
+        await amake_password(password)
+    # Inactive users get the same answer as a wrong password, like ModelBackend in user_login
+    if user is None or not await acheck_password(password, user.password) or not user.is_active:
+        return _json_response({
+            'status': 'error',
+            'message': _('نام کاربری یا رمز عبور اشتباه است.')
+        }, status.HTTP_401_UNAUTHORIZED)
+
+    # Generate JWT tokens
+    refresh = RevocableRefreshToken.for_user(user)
+    access_token = refresh.access_token
+    await aupdate_last_login(user)
+
+    return _json_response({
+        'status': 'success',
+        'message': _('ورود با موفقیت انجام شد.'),
+        'tokens': {
+            'access': str(access_token),
+            'refresh': str(refresh),
+        },
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+        }
+    }, status.HTTP_200_OK)
+
+
+async def user_logout_async(request):
+    """
+    Async user logout endpoint. Requires JWT access token.
+    Revokes the access token and the refresh token sent in the body (optional).
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    user, token, error_response = await _authenticate(request)
+    if error_response:
+        return error_response
+    data = _parse_body(request)
+    if data is None:
+        return _invalid_body_response()
+
+    tokens = [token]
+    if data.get('refresh'):
+        try:
+            tokens.append(decode_user_refresh_token(data['refresh'], user.pk))
+        except TokenError as e:
+            return _json_response({
+                'status': 'error',
+                'errors': {'refresh': [str(e)]}
+            }, status.HTTP_400_BAD_REQUEST)
+    await sync_to_async(revoke_tokens)(*tokens)
+
+    return _json_response({
+        'status': 'success',
+        'message': _('خروج با موفقیت انجام شد.')
+    }, status.HTTP_200_OK)
+
+
+async def user_profile_async(request):
+    """
+    Async user profile endpoint - GET, PUT and PATCH. Requires JWT access token.
+    """
+    if request.method not in ('GET', 'PUT', 'PATCH'):
+        return HttpResponseNotAllowed(['GET', 'PUT', 'PATCH'])
+    user, token, error_response = await _authenticate(request)
+    if error_response:
+        return error_response
+
+    if request.method != 'GET':
+        data = _parse_body(request)
+        if data is None:
+            return _invalid_body_response()
+        serializer = AsyncUserUpdateSerializer(user, data=data, partial=request.method == 'PATCH')
+        if not serializer.is_valid():
+            return _json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        email = serializer.validated_data.get('email')
+        if email and await AsyncUserUpdateSerializer.get_email_conflicts_queryset(email, user.pk).aexists():
+            return _json_response({
+                'email': [AsyncUserRegistrationSerializer.email_taken_message]
+            }, status.HTTP_400_BAD_REQUEST)
+        for field, value in serializer.validated_data.items():
+            setattr(user, field, value)
+        try:
+            await user.asave(update_fields=list(serializer.validated_data))
+        except IntegrityError as e:
+            # Lost a race with a concurrent update or registration
+            errors = AsyncUserRegistrationSerializer.get_integrity_errors(e)
+            if errors is None:
+                raise
+            return _json_response(errors, status.HTTP_400_BAD_REQUEST)
+
+    # Load roles with the async ORM so the serializer runs no query
+    user_roles = [
+        user_role
+        async for user_role in UserRole.objects.filter(user=user, is_active=True).select_related('role')
+    ]
+    setattr(user, UserProfileSerializer.active_user_roles_attr, user_roles)
+    data = UserProfileSerializer(user).data
+
+    if request.method == 'GET':
+        return _json_response(data, status.HTTP_200_OK)
+    return _json_response({
+        'status': 'success',
+        'message': _('پروفایل با موفقیت بروزرسانی شد.'),
+        'user': data
+    }, status.HTTP_200_OK)
+
+
+async def password_change_async(request):
+    """
+    Async password change endpoint. Requires JWT access token.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    user, token, error_response = await _authenticate(request)
+    if error_response:
+        return error_response
+    throttled = await _throttle(
+        ('password_change_ip', get_client_ident(request)),
+        ('password_change_user', user.pk),
+    )
+    if throttled:
+        return throttled
+    data = _parse_body(request)
+    if data is None:
+        return _invalid_body_response()
+
+    serializer = AsyncPasswordChangeSerializer(data=data)
+    if not serializer.is_valid():
+        return _json_response({
+            'status': 'error',
+            'errors': serializer.errors
+        }, status.HTTP_400_BAD_REQUEST)
+
+    if not await acheck_password(serializer.validated_data['old_password'], user.password):
+        return _json_response({
+            'status': 'error',
+            'errors': {'old_password': [_('رمز عبور فعلی اشتباه است.')]}
+        }, status.HTTP_400_BAD_REQUEST)
+
+    user.password = await amake_password(serializer.validated_data['new_password'])
+    await user.asave(update_fields=['password'])
+    await sync_to_async(record_event)(
+        request, AuditEvent.Action.PASSWORD_CHANGED, AuditEvent.TargetType.USER, user.pk, actor=user
+    )
+    # Tokens issued before the change are revoked (CHECK_REVOKE_TOKEN); return new ones
+    refresh = RevocableRefreshToken.for_user(user)
+    return _json_response({
+        'status': 'success',
+        'message': _('رمز عبور با موفقیت تغییر کرد.'),
+        'tokens': {
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+        }
+    }, status.HTTP_200_OK)
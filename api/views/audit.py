@@ -0,0 +1,44 @@
+# Third Party Packages
+from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
+from rest_framework import status
+
+# Local Apps
+from utils.authentication import CachedJWTAuthentication
+from utils.pagination import OccurredCursorPagination
+from utils.permissions import HasRole
+from ..models import AuditEvent
+from ..serializers import AuditEventSerializer, AuditEventFilterSerializer
+
+
+class AuditEventListView(ListAPIView):
+    """
+    List audit events, newest first. Requires admin role.
+    Filters: ?actor=, ?target_type=&target_id=, ?action=, ?since=&until= (ISO 8601).
+    Cursor paginated on (occurred_at, id); every filter is served by an index.
+    """
+    serializer_class = AuditEventSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [HasRole('admin')]
+    pagination_class = OccurredCursorPagination
+
+    def get_queryset(self):
+        filters = self.filters
+        return AuditEvent.objects.matching(
+            actor_id=filters.get('actor'),
+            target_type=filters.get('target_type'),
+            target_id=filters.get('target_id'),
+            action=filters.get('action'),
+            since=filters.get('since'),
+            until=filters.get('until'),
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer = AuditEventFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        self.filters = serializer.validated_data
+        return super().list(request, *args, **kwargs)
@@ -1,18 +1,33 @@
 # Django Built-in modules
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
 # Third Party Packages
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.generics import RetrieveUpdateAPIView
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
 
 # Local Apps
+from utils.audit import record_event
+from utils.authentication import CachedJWTAuthentication, update_last_login
+from utils.conditional import ConditionalRequestMixin, make_etag
 from utils.permissions import AllowAnyWithAPIKey, IsAuthenticatedWithAPIKey
+from utils.revocation import revoke_tokens
+from utils.roles import get_user_roles_version
+from utils.throttling import (
+    LoginIPThrottle,
+    LoginUsernameThrottle,
+    RegisterIPThrottle,
+    PasswordChangeIPThrottle,
+    PasswordChangeUserThrottle,
+)
+from utils.tokens import RevocableRefreshToken, decode_user_refresh_token
+from ..models import AuditEvent
 from ..serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -25,14 +40,24 @@ User = get_user_model()
 
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAnyWithAPIKey])
+@throttle_classes([RegisterIPThrottle])
 def user_register(request):
     """
     User registration endpoint.
+    No authentication runs, so throttled requests are rejected before any database work.
     """
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except ValidationError as e:
+            # Lost a race with a concurrent registration: same body as the validation errors
+            return Response({
+                'status': 'error',
+                'errors': e.detail
+            }, status=status.HTTP_400_BAD_REQUEST)
         return Response({
             'status': 'success',
             'message': _('کاربر با موفقیت ثبت نام شد.'),
@@ -49,10 +74,14 @@ def user_register(request):
 
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAnyWithAPIKey])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def user_login(request):
     """
     User login endpoint with JWT token generation.
+    With AUTH_STATELESS_LOGIN no session is created and last_login updates are coalesced.
+    Throttled per IP and per username before any password is hashed.
     """
     serializer = UserLoginSerializer(data=request.data)
     if serializer.is_valid():
@@ -63,11 +92,14 @@ def user_login(request):
         if user is not None:
             if user.is_active:
                 # Generate JWT tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = RevocableRefreshToken.for_user(user)
                 access_token = refresh.access_token
                 
-                # Also create session for backward compatibility
-                login(request, user)
+                if settings.AUTH_STATELESS_LOGIN:
+                    update_last_login(user)
+                else:
+                    # Also create session for backward compatibility
+                    login(request, user)
                 
                 return Response({
                     'status': 'success',
@@ -102,26 +134,41 @@ def user_login(request):
 
 
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticatedWithAPIKey])
 def user_logout(request):
     """
     User logout endpoint. Requires JWT access token.
+    Revokes the access token and the refresh token sent in the body (optional).
     """
-    logout(request)
+    tokens = [request.auth]
+    if request.data.get('refresh'):
+        try:
+            tokens.append(decode_user_refresh_token(request.data['refresh'], request.user.pk))
+        except TokenError as e:
+            return Response({
+                'status': 'error',
+                'errors': {'refresh': [str(e)]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+    revoke_tokens(*tokens)
+
+    # Stateless (JWT only) clients have no session to flush
+    if request.session.session_key is not None:
+        logout(request)
     return Response({
         'status': 'success',
         'message': _('خروج با موفقیت انجام شد.')
     }, status=status.HTTP_200_OK)
 
 
-class UserProfileView(RetrieveUpdateAPIView):
+class UserProfileView(ConditionalRequestMixin, RetrieveUpdateAPIView):
     """
     User profile view - GET and PUT endpoints.
     Requires JWT access token for authentication.
+    Supports conditional GET and If-Match on PUT/PATCH.
     """
     serializer_class = UserProfileSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticatedWithAPIKey]
 
     def get_object(self):
@@ -130,6 +177,16 @@ class UserProfileView(RetrieveUpdateAPIView):
         """
         return self.request.user
 
+    def get_validators(self, request):
+        """
+        Validators of the profile: profile fields and the roles version of the user.
+        """
+        user = request.user
+        return make_etag(
+            user.pk, user.username, user.email, user.first_name, user.last_name,
+            user.date_joined, user.last_login, get_user_roles_version(user.pk),
+        ), None
+
     def get_serializer_class(self):
         """
         Return appropriate serializer based on request method.
@@ -142,34 +199,47 @@ class UserProfileView(RetrieveUpdateAPIView):
         """
         Update user profile.
         """
+        precondition_failed = self.evaluate_conditions(request)
+        if precondition_failed:
+            return precondition_failed
+
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
-        return Response({
+        return self.add_validator_headers(request, Response({
             'status': 'success',
             'message': _('پروفایل با موفقیت بروزرسانی شد.'),
             'user': UserProfileSerializer(instance).data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK))
 
 
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticatedWithAPIKey])
+@throttle_classes([PasswordChangeIPThrottle, PasswordChangeUserThrottle])
 def password_change(request):
     """
     Password change endpoint. Requires JWT access token.
+    Throttled per IP and per user before the old password is checked.
+    Every token issued before the change is revoked (CHECK_REVOKE_TOKEN); new ones are returned.
     """
     serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
         user = request.user
         user.set_password(serializer.validated_data['new_password'])
         user.save()
+        record_event(request, AuditEvent.Action.PASSWORD_CHANGED, AuditEvent.TargetType.USER, user.pk)
+        refresh = RevocableRefreshToken.for_user(user)
         return Response({
             'status': 'success',
-            'message': _('رمز عبور با موفقیت تغییر کرد.')
+            'message': _('رمز عبور با موفقیت تغییر کرد.'),
+            'tokens': {
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            }
         }, status=status.HTTP_200_OK)
     return Response({
         'status': 'error',
@@ -0,0 +1,53 @@
+# Django Built-in modules
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+
+# Third Party Packages
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+
+# Local Apps
+from utils.authentication import CachedJWTAuthentication
+from utils.export import EXPORT_DATASETS, EXPORT_FORMATS, aiter_export, stream_export
+from utils.permissions import HasRole
+from ..serializers import ExportFilterSerializer
+
+
+class ExportView(APIView):
+    """
+    Stream a whole dataset (users, user-roles, roles) as NDJSON or CSV. Requires admin role.
+    Filters: ?role=, ?is_active=, ?since=&until= (ISO 8601), applied in SQL.
+    Rows are read and encoded chunk by chunk, so memory use is constant. Under ASGI the
+    body is an async iterator: Django would read a sync one into a list first.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [HasRole('admin')]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is NDJSON or CSV whatever the Accept header; the renderers are for errors only
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, dataset, file_format):
+        if dataset not in EXPORT_DATASETS or file_format not in EXPORT_FORMATS:
+            return Response({
+                'status': 'error',
+                'message': _('خروجی یافت نشد.')
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = ExportFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        chunks = stream_export(dataset, file_format, **serializer.validated_data)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_export(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[file_format])
+        response.headers['Content-Disposition'] = f'attachment; filename="{dataset}.{file_format}"'
+        # Do not let a proxy buffer the whole export
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
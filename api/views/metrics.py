@@ -0,0 +1,29 @@
+# Third Party Packages
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.response import Response
+from rest_framework import status
+
+# Local Apps
+from utils.audit import get_audit_stats
+from utils.authentication import CachedJWTAuthentication, get_user_cache_stats
+from utils.instrumentation import get_route_stats
+from utils.permissions import HasRole
+from utils.throttling import get_blocked_counts
+
+
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([HasRole('admin')])
+def metrics(request):
+    """
+    Runtime counters of this process, for monitoring. Requires admin role.
+    """
+    return Response({
+        'status': 'success',
+        'throttling': {
+            'blocked': get_blocked_counts(),
+        },
+        'user_cache': get_user_cache_stats(),
+        'routes': get_route_stats(),
+        'audit': get_audit_stats(),
+    }, status=status.HTTP_200_OK)
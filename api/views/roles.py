@@ -1,5 +1,11 @@
+# Python Standard Library
+from collections import defaultdict
+
 # Django Built-in modules
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 # Third Party Packages
@@ -7,55 +13,151 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.response import Response
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework import status
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 # Local Apps
+from utils.audit import record_event, record_events
+from utils.authentication import CachedJWTAuthentication
+from utils.conditional import ConditionalRequestMixin, make_etag
+from utils.db_router import primary_reads
+from utils.pagination import CreatedCursorPagination
 from utils.permissions import HasRole
-from ..models import Role, UserRole
-from ..serializers import RoleSerializer, UserRoleSerializer
+from utils.response_cache import build_response, get_cached_response, store_response
+from utils.roles import get_role_generation, invalidate_user_roles, sync_role_masks
+from ..models import AuditEvent, Role, UserRole
+from ..serializers import RoleSerializer, UserRoleSerializer, BulkUserRoleSerializer
 
 User = get_user_model()
 
+Action = AuditEvent.Action
+TargetType = AuditEvent.TargetType
+
+
+def _audit_value(value):
+    """
+    JSON value of a field for the audit log (related roles by id).
+    """
+    return value.pk if isinstance(value, Role) else value
+
 
-class RoleListViewSet(ListCreateAPIView):
+class RoleListViewSet(ConditionalRequestMixin, ListCreateAPIView):
     """
     List and create roles. Requires admin role.
+    Listing is cursor paginated on (created, id) and supports conditional GET.
+    Rendered JSON pages are cached per encoding until a role changes.
     """
     queryset = Role.objects.filter(is_active=True)
     serializer_class = RoleSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [HasRole('admin')]
+    pagination_class = CreatedCursorPagination
 
     def get_queryset(self):
         """
         Return active roles.
         """
-        return Role.objects.filter(is_active=True).order_by('-created')
+        return Role.objects.filter(is_active=True).order_by('-created', '-id')
+
+    def get_validators(self, request):
+        """
+        Validators of the active role set: row count and latest update.
+        """
+        state = self.get_queryset().order_by().aggregate(count=Count('id'), last_modified=Max('updated'))
+        return make_etag(state['count'], state['last_modified']), state['last_modified']
+
+    def perform_create(self, serializer):
+        role = serializer.save()
+        record_event(self.request, Action.ROLE_CREATED, TargetType.ROLE, role.pk, code=role.code)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Serve the page from the response cache; render and cache it on a miss.
+        """
+        renderer = request.accepted_renderer
+        if renderer.format != 'json' or request.accepted_media_type != renderer.media_type:
+            # Browsable API or JSON parameters (e.g. indent): not cached
+            return super().list(request, *args, **kwargs)
+
+        # Read before the rows, so a page rendered during a role change is stored under the old generation
+        generation = get_role_generation()
+        entry = get_cached_response('roles', generation, request)
+        if entry is None:
+            with primary_reads():
+                validators = self.get_validators(request)
+                page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+                data = self.get_paginated_response(self.get_serializer(page, many=True).data).data
+            body = renderer.render(data, request.accepted_media_type, self.get_renderer_context())
+            entry = store_response('roles', generation, request, body, validators)
+
+        validators = entry[2]
+        return self.evaluate_conditions(request, validators) or self.add_validator_headers(
+            request, build_response(entry, renderer.media_type), validators
+        )
 
 
-class RoleDetailViewSet(RetrieveUpdateDestroyAPIView):
+class RoleDetailViewSet(ConditionalRequestMixin, RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete a role. Requires admin role.
+    Supports conditional GET and If-Match on PUT/PATCH/DELETE.
     """
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [HasRole('admin')]
 
+    def get_object(self):
+        """
+        Return the role, loaded once per request.
+        """
+        if not hasattr(self, '_role'):
+            self._role = super().get_object()
+        return self._role
+
+    def get_validators(self, request):
+        """
+        Validators of the role: its id and latest update.
+        """
+        role = self.get_object()
+        return make_etag(role.pk, role.updated.isoformat()), role.updated
+
+    def perform_update(self, serializer):
+        """
+        Save the role; an is_active change also (de)activates its user roles.
+        """
+        is_active = serializer.validated_data.pop('is_active', None)
+        role = serializer.instance
+        changes = {
+            field: [_audit_value(getattr(role, field)), _audit_value(value)]
+            for field, value in serializer.validated_data.items()
+            if getattr(role, field) != value
+        }
+        with transaction.atomic():
+            role = serializer.save()
+            if changes:
+                record_event(self.request, Action.ROLE_UPDATED, TargetType.ROLE, role.pk, changes=changes)
+            if is_active is not None and is_active != role.is_active:
+                role.set_active(is_active)
+                record_event(
+                    self.request,
+                    Action.ROLE_ACTIVATED if is_active else Action.ROLE_DEACTIVATED,
+                    TargetType.ROLE,
+                    role.pk,
+                )
+
     def perform_destroy(self, instance):
         """
-        Soft delete: set is_active to False instead of deleting.
+        Soft delete: deactivate the role and its user roles instead of deleting.
         """
-        instance.is_active = False
-        instance.save()
+        instance.set_active(False)
+        record_event(self.request, Action.ROLE_DEACTIVATED, TargetType.ROLE, instance.pk)
 
 
 @api_view(['GET', 'POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([HasRole('admin')])
 def user_role_list(request, user_id):
     """
     List or add roles for a specific user. Requires admin role.
+    Listing is cursor paginated on (created, id).
     """
     try:
         user = User.objects.get(id=user_id)
@@ -67,10 +169,14 @@ def user_role_list(request, user_id):
 
     if request.method == 'GET':
         user_roles = UserRole.objects.filter(user=user, is_active=True).select_related('role')
-        serializer = UserRoleSerializer(user_roles, many=True)
+        paginator = CreatedCursorPagination()
+        page = paginator.paginate_queryset(user_roles, request)
+        serializer = UserRoleSerializer(page, many=True)
         return Response({
             'status': 'success',
             'user': user.username,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
             'roles': serializer.data
         }, status=status.HTTP_200_OK)
 
@@ -96,9 +202,12 @@ def user_role_list(request, user_id):
                 defaults={'is_active': True}
             )
             
+            assigned = created or not user_role.is_active
             if not created:
                 user_role.is_active = True
                 user_role.save()
+            if assigned:
+                record_event(request, Action.USER_ROLE_ASSIGNED, TargetType.USER, user.pk, role_id=role.pk)
 
             serializer = UserRoleSerializer(user_role)
             return Response({
@@ -114,7 +223,7 @@ def user_role_list(request, user_id):
 
 
 @api_view(['DELETE'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([HasRole('admin')])
 def user_role_remove(request, user_id, role_id):
     """
@@ -141,10 +250,149 @@ def user_role_remove(request, user_id, role_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
     user_role.is_active = False
+    # Not restored if the role is deactivated and activated again
+    user_role.suspended_by_role = False
     user_role.save()
+    record_event(request, Action.USER_ROLE_REMOVED, TargetType.USER, user.pk, role_id=role.pk)
 
     return Response({
         'status': 'success',
         'message': _('نقش با موفقیت از کاربر حذف شد.')
     }, status=status.HTTP_200_OK)
 
+
+
+def _pair_key(user_id, role_id):
+    return f'{user_id}:{role_id}'
+
+
+@api_view(['POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([HasRole('admin')])
+def user_role_bulk_assign(request):
+    """
+    Assign many roles to many users in a bounded number of queries. Requires admin role.
+    Body: {"assignments": [{"user_id": 1, "role_id": 2}, ...]} or {"role_id": 2, "user_ids": [1, 3]}
+    Result per "user_id:role_id": created, reactivated, unchanged, user_not_found or role_not_found.
+    """
+    serializer = BulkUserRoleSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'status': 'error',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    pairs = serializer.validated_data['pairs']
+    user_ids = {user_id for user_id, _role_id in pairs}
+    role_ids = {role_id for _user_id, role_id in pairs}
+    existing_user_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+    active_role_ids = set(Role.objects.filter(id__in=role_ids, is_active=True).values_list('id', flat=True))
+    current = dict(
+        ((user_id, role_id), is_active)
+        for user_id, role_id, is_active in UserRole.objects.filter(
+            user_id__in=existing_user_ids,
+            role_id__in=active_role_ids,
+        ).values_list('user_id', 'role_id', 'is_active')
+    )
+
+    results = {}
+    to_write = []
+    for user_id, role_id in pairs:
+        if user_id not in existing_user_ids:
+            result = 'user_not_found'
+        elif role_id not in active_role_ids:
+            result = 'role_not_found'
+        elif (user_id, role_id) not in current:
+            result = 'created'
+        elif not current[(user_id, role_id)]:
+            result = 'reactivated'
+        else:
+            result = 'unchanged'
+        results[_pair_key(user_id, role_id)] = result
+        if result in ('created', 'reactivated'):
+            to_write.append(UserRole(user_id=user_id, role_id=role_id, is_active=True))
+
+    if to_write:
+        with transaction.atomic():
+            UserRole.objects.bulk_create(
+                to_write,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['user', 'role'],
+                update_fields=['is_active', 'updated'],
+            )
+            # bulk_create does not send post_save
+            changed_user_ids = {user_role.user_id for user_role in to_write}
+            sync_role_masks(user_id__in=changed_user_ids)
+            record_events(request, [
+                (Action.USER_ROLE_ASSIGNED, TargetType.USER, user_role.user_id, {'role_id': user_role.role_id})
+                for user_role in to_write
+            ])
+            transaction.on_commit(lambda: invalidate_user_roles(*changed_user_ids))
+
+    return Response({
+        'status': 'success',
+        'message': _('نقش‌ها با موفقیت به کاربران اضافه شدند.'),
+        'results': results,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([HasRole('admin')])
+def user_role_bulk_revoke(request):
+    """
+    Revoke many roles from many users with one UPDATE per role. Requires admin role.
+    Body: same as user_role_bulk_assign.
+    Result per "user_id:role_id": revoked or not_assigned.
+    User roles suspended by an inactive role are revoked too, so they are not restored with it.
+    """
+    serializer = BulkUserRoleSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'status': 'error',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    pairs = serializer.validated_data['pairs']
+    user_ids = {user_id for user_id, _role_id in pairs}
+    role_ids = {role_id for _user_id, role_id in pairs}
+    active_pairs = set(UserRole.objects.filter(
+        Q(is_active=True) | Q(suspended_by_role=True),
+        user_id__in=user_ids,
+        role_id__in=role_ids,
+    ).values_list('user_id', 'role_id'))
+
+    results = {}
+    users_by_role = defaultdict(list)
+    for user_id, role_id in pairs:
+        if (user_id, role_id) in active_pairs:
+            results[_pair_key(user_id, role_id)] = 'revoked'
+            users_by_role[role_id].append(user_id)
+        else:
+            results[_pair_key(user_id, role_id)] = 'not_assigned'
+
+    if users_by_role:
+        now = timezone.now()
+        with transaction.atomic():
+            for role_id, role_user_ids in users_by_role.items():
+                UserRole.objects.filter(
+                    Q(is_active=True) | Q(suspended_by_role=True),
+                    role_id=role_id,
+                    user_id__in=role_user_ids,
+                ).update(is_active=False, suspended_by_role=False, updated=now)
+            # update() does not send post_save
+            changed_user_ids = {user_id for user_id, _role_id in active_pairs}
+            sync_role_masks(user_id__in=changed_user_ids)
+            record_events(request, [
+                (Action.USER_ROLE_REMOVED, TargetType.USER, user_id, {'role_id': role_id})
+                for role_id, role_user_ids in users_by_role.items()
+                for user_id in role_user_ids
+            ])
+            transaction.on_commit(lambda: invalidate_user_roles(*changed_user_ids))
+
+    return Response({
+        'status': 'success',
+        'message': _('نقش‌ها با موفقیت از کاربران حذف شدند.'),
+        'results': results,
+    }, status=status.HTTP_200_OK)
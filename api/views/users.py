@@ -0,0 +1,30 @@
+# Django Built-in modules
+from django.contrib.auth import get_user_model
+
+# Third Party Packages
+from rest_framework.generics import ListAPIView
+
+# Local Apps
+from utils.authentication import CachedJWTAuthentication
+from utils.pagination import StandardPageNumberPagination
+from utils.permissions import HasRole
+from ..serializers import UserProfileSerializer
+
+User = get_user_model()
+
+
+class UserListViewSet(ListAPIView):
+    """
+    List users with their active roles. Requires admin role.
+    Runs a constant number of queries regardless of the page size.
+    """
+    serializer_class = UserProfileSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [HasRole('admin')]
+    pagination_class = StandardPageNumberPagination
+
+    def get_queryset(self):
+        """
+        Return users with their active roles prefetched.
+        """
+        return UserProfileSerializer.setup_eager_loading(User.objects.order_by('id'))
@@ -2,8 +2,10 @@
 Django settings for lotus_cosmetic_services project.
 """
 
+import sys
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,8 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.middleware.RequestInstrumentationMiddleware',  # Query / timing instrumentation (first, to time everything)
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware (should be as high as possible)
+    'utils.middleware.ReplicaRoutingMiddleware',  # Route safe reads to read replicas
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +95,100 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database: comma separated hosts (file names for SQLite).
+# Each one becomes a 'replicaN' alias; see utils/db_router.py.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    config('DB_REPLICAS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]),
+    start=1,
+):
+    alias = f'replica{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    DATABASES[alias]['NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'] = replica
+    DATABASE_REPLICAS.append(alias)
+
+# Under manage.py test without replicas: a separate replica1 database for the routing tests
+# (api/tests.py), which enable it with override_settings(DATABASE_REPLICAS=['replica1'])
+TESTING = sys.argv[1:2] == ['test']
+if TESTING and not DATABASE_REPLICAS:
+    DATABASES['replica1'] = {
+        **DATABASES['default'],
+        # SQLite test databases are in memory per alias; other backends need their own name
+        'TEST': {} if DATABASES['default']['ENGINE'].endswith('sqlite3') else {
+            'NAME': f"test_{DATABASES['default']['NAME']}_replica1",
+        },
+    }
+
+DATABASE_ROUTERS = ['utils.db_router.PrimaryReplicaRouter']
+
+# Seconds during which a client that wrote keeps reading from the primary
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+
+# Request instrumentation (see utils/middleware.py and utils/instrumentation.py)
+# Slow requests and requests with too many queries are logged on the 'utils.instrumentation' logger
+
+REQUEST_INSTRUMENTATION = {
+    # On by default in development only: it wraps every query, and test runs would log their SQL
+    'ENABLED': config('REQUEST_INSTRUMENTATION', default=DEBUG and not TESTING, cast=bool),
+    'SERVER_TIMING': config('SERVER_TIMING_HEADER', default=True, cast=bool),
+    'SLOW_REQUEST_MS': config('SLOW_REQUEST_MS', default=500, cast=int),
+    'MAX_QUERIES': config('SLOW_REQUEST_MAX_QUERIES', default=20, cast=int),
+    # Number of slowest / repeated statements logged per request
+    'LOGGED_QUERIES': 5,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Role caches, their generation / version stamps, user cache invalidation and cached responses
+# are shared through this cache: with a per-process backend, a role change only reaches the
+# other workers when their entries expire. Production needs a shared backend (Redis, Memcached
+# or the database cache).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='lotus-cosmetic-services'),
+    }
+}
+if not DEBUG and CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+):
+    raise ImproperlyConfigured(
+        'CACHE_BACKEND must be a cache shared by all processes (e.g. '
+        'django.core.cache.backends.redis.RedisCache) when DEBUG is off.'
+    )
+
+# Role codes cache TTL in seconds (see utils/roles.py)
+ROLE_CACHE_TIMEOUT = config('ROLE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Cached rendered responses (role catalog) TTL in seconds (see utils/response_cache.py)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Rows fetched from the database at a time by the streaming exports (see utils/export.py)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+
+# Authentication
+# Stateless login: JWT only, no session is created on login (see api/views/authentication.py)
+AUTH_STATELESS_LOGIN = config('AUTH_STATELESS_LOGIN', default=False, cast=bool)
+
+# In stateless mode, last_login is written at most once per this many seconds per user
+LAST_LOGIN_UPDATE_INTERVAL = config('LAST_LOGIN_UPDATE_INTERVAL', default=900, cast=int)
+
+# Process-local cache of authenticated users (see utils/authentication.py): TTL in seconds and max entries
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=60, cast=int)
+USER_CACHE_MAX_SIZE = config('USER_CACHE_MAX_SIZE', default=10000, cast=int)
+
+# Threads hashing passwords for the async authentication views (see utils/hashing.py)
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=4, cast=int)
+
+# Token bucket store of the authentication throttles: 'memory' (per process) or 'cache' (shared)
+# Rates are in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] (see utils/throttling.py)
+THROTTLE_BACKEND = config('THROTTLE_BACKEND', default='memory')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -177,12 +275,23 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-match',
+    'if-modified-since',
+    'if-none-match',
+    'if-unmodified-since',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Response validators readable by the frontend (conditional GET / If-Match)
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'last-modified',
+    'server-timing',
+]
+
 # For development, you can also use:
 # CORS_ALLOW_ALL_ORIGINS = True  # Only for development!
 
@@ -197,6 +306,16 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Number of reverse proxies in front of the app; per-IP throttles trust X-Forwarded-For accordingly
+    'NUM_PROXIES': config('NUM_PROXIES', default=None, cast=lambda value: None if value is None else int(value)),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('THROTTLE_LOGIN_IP', default='30/min'),
+        'login_username': config('THROTTLE_LOGIN_USERNAME', default='5/min'),
+        'register_ip': config('THROTTLE_REGISTER_IP', default='10/hour'),
+        'token_refresh_ip': config('THROTTLE_TOKEN_REFRESH_IP', default='60/min'),
+        'password_change_ip': config('THROTTLE_PASSWORD_CHANGE_IP', default='10/min'),
+        'password_change_user': config('THROTTLE_PASSWORD_CHANGE_USER', default='5/min'),
+    },
 }
 
 # JWT Settings
@@ -216,6 +335,32 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.RoleTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'api.serializers.RoleTokenVerifySerializer',
+    # Tokens carry a hash of the password: changing it revokes every issued token
+    'CHECK_REVOKE_TOKEN': True,
+}
+
+# Revoked JWT ids (see utils/revocation.py): in-memory Bloom filter size, false positive rate
+# and the maximum seconds before a process sees revocations made by other processes
+REVOCATION_BLOOM_CAPACITY = config('REVOCATION_BLOOM_CAPACITY', default=100000, cast=int)
+REVOCATION_BLOOM_ERROR_RATE = config('REVOCATION_BLOOM_ERROR_RATE', default=0.001, cast=float)
+REVOCATION_SYNC_INTERVAL = config('REVOCATION_SYNC_INTERVAL', default=5, cast=int)
+
+# Audit log (see utils/audit.py): events are queued in-process and written in batches by a
+# background thread, on BATCH_SIZE events or FLUSH_INTERVAL seconds. A full queue blocks the
+# request for up to BLOCK_TIMEOUT seconds, then the request writes its events itself. Failed
+# inserts are retried WRITE_ATTEMPTS times before the events are logged in full.
+AUDIT_LOG = {
+    'ENABLED': config('AUDIT_LOG', default=True, cast=bool),
+    'SYNC': config('AUDIT_LOG_SYNC', default=False, cast=bool),
+    'BATCH_SIZE': config('AUDIT_LOG_BATCH_SIZE', default=500, cast=int),
+    'FLUSH_INTERVAL': config('AUDIT_LOG_FLUSH_INTERVAL', default=1.0, cast=float),
+    'QUEUE_SIZE': config('AUDIT_LOG_QUEUE_SIZE', default=10000, cast=int),
+    'BLOCK_TIMEOUT': 1.0,
+    'WRITE_ATTEMPTS': 3,
+    'RETRY_DELAY': 0.5,
+    'DRAIN_TIMEOUT': 10.0,
 }
 
 # Unfold Admin Settings
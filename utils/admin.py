@@ -1,5 +1,12 @@
+# Python Standard Library
+import json
+
 # Django Built-in modules
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 
@@ -15,3 +22,52 @@ class DateTimeAdminMixin:
     )
     readonly_fields = ('created', 'updated',)
 
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the count of large results instead of running COUNT(*).
+    PostgreSQL only: unfiltered querysets use the table statistics (pg_class.reltuples),
+    filtered ones the row estimate of EXPLAIN. Small results are still counted exactly.
+    """
+    # Below this estimate an exact count is cheap enough
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate_count()
+        if estimate is None or estimate < self.exact_count_limit:
+            return super().count
+        return estimate
+
+    def estimate_count(self):
+        """
+        Return the estimated number of objects, or None if it cannot be estimated.
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or connections[queryset.db].vendor != 'postgresql':
+            return None
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+                # reltuples is -1 until the table is first analyzed
+                return int(row[0]) if row and row[0] >= 0 else None
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class LargeTableAdminMixin:
+    """
+    Mixin for admin classes of tables with millions of rows: estimated changelist
+    counts and no second COUNT(*) of the whole table.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,258 @@
+# Python Standard Library
+import atexit
+import ipaddress
+import logging
+import os
+import queue
+import threading
+import time
+
+# Django Built-in modules
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+audit_logger = logging.getLogger('utils.audit')
+
+DEFAULT_AUDIT_LOG = {
+    'ENABLED': True,
+    # Write events in the calling thread (tests, scripts) instead of the background writer
+    'SYNC': False,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'QUEUE_SIZE': 10000,
+    # Seconds a producer waits in total for room in a full queue before writing the rest itself
+    'BLOCK_TIMEOUT': 1.0,
+    # Attempts of each insert; after the last one the events are logged in full (ERROR level)
+    'WRITE_ATTEMPTS': 3,
+    # Seconds before the first retry, doubled after each attempt
+    'RETRY_DELAY': 0.5,
+    # Seconds the writer may take to drain the queue on shutdown
+    'DRAIN_TIMEOUT': 10.0,
+}
+
+
+def get_audit_settings():
+    """
+    Return the AUDIT_LOG setting merged over the defaults.
+    """
+    return {**DEFAULT_AUDIT_LOG, **getattr(settings, 'AUDIT_LOG', {})}
+
+
+class AuditWriter:
+    """
+    In-process queue of audit events, written with bulk_create by a background thread
+    once batch_size events are waiting or flush_interval seconds after the first one.
+    A full queue blocks the producer (backpressure); if it stays full, the producer
+    writes its events itself, so backpressure never drops events. close() drains the queue.
+    A failed insert is retried; events still not written are logged in full, which is
+    then their only record.
+    """
+    _stop = object()
+
+    def __init__(self, batch_size, flush_interval, queue_size, write_attempts=3, retry_delay=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.write_attempts = write_attempts
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {'queued': 0, 'direct': 0, 'written': 0, 'failed': 0}
+
+    def _ensure_started(self):
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                if self._pid != os.getpid():
+                    # A forked worker must not write the events queued by its parent again
+                    self._queue = queue.Queue(maxsize=self.queue_size)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _count(self, name, value):
+        with self._lock:
+            self._stats[name] += value
+
+    def put(self, events, block_timeout):
+        """
+        Queue events for the background writer, waiting at most block_timeout in total.
+        """
+        self._ensure_started()
+        deadline = time.monotonic() + block_timeout
+        direct = []
+        for index, event in enumerate(events):
+            try:
+                self._queue.put(event, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                direct = events[index:]
+                break
+        self._count('queued', len(events) - len(direct))
+        if direct:
+            # The writer cannot keep up: write here rather than lose the events
+            self._count('direct', len(direct))
+            self.write(direct)
+
+    def write(self, events):
+        """
+        Insert events with bulk_create, retrying failures with a growing delay.
+        Events that cannot be written are logged with their content.
+        """
+        # Import here to avoid circular imports
+        from api.models import AuditEvent
+
+        delay = self.retry_delay
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                AuditEvent.objects.bulk_create([AuditEvent(**event) for event in events], batch_size=self.batch_size)
+            except Exception:
+                if attempt == self.write_attempts:
+                    self._count('failed', len(events))
+                    audit_logger.exception('Could not write %s audit events: %r', len(events), events)
+                    return
+                audit_logger.warning('Could not write %s audit events (attempt %s), retrying', len(events), attempt)
+                # A broken connection is replaced before the next attempt
+                close_old_connections()
+                time.sleep(delay)
+                delay *= 2
+            else:
+                self._count('written', len(events))
+                return
+
+    def _flush(self, batch):
+        close_old_connections()
+        self.write(batch)
+        for _event in batch:
+            self._queue.task_done()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+            if event is self._stop:
+                self._queue.task_done()
+                while True:
+                    try:
+                        event = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(event)
+                if batch:
+                    self._flush(batch)
+                return
+            if event is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(event)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+
+    def flush(self):
+        """
+        Block until every queued event is written.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout):
+        """
+        Write the queued events and stop the background thread.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(self._stop)
+        thread.join(timeout)
+
+    def get_stats(self):
+        with self._lock:
+            return {**self._stats, 'pending': self._queue.qsize()}
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                options = get_audit_settings()
+                _writer = AuditWriter(
+                    options['BATCH_SIZE'], options['FLUSH_INTERVAL'], options['QUEUE_SIZE'],
+                    options['WRITE_ATTEMPTS'], options['RETRY_DELAY'],
+                )
+                atexit.register(_writer.close, options['DRAIN_TIMEOUT'])
+    return _writer
+
+
+def get_audit_stats():
+    """
+    Return the counters of the audit writer of this process.
+    """
+    return get_audit_writer().get_stats()
+
+
+def _get_ip_address(request):
+    # Import here to avoid circular imports
+    from .throttling import get_client_ident
+
+    ident = get_client_ident(request)
+    try:
+        ipaddress.ip_address(ident)
+    except ValueError:
+        # e.g. an unparsed X-Forwarded-For chain (NUM_PROXIES is not set)
+        return request.META.get('REMOTE_ADDR') or None
+    return ident
+
+
+def record_events(request, events, actor=None):
+    """
+    Record (action, target_type, target_id, data) audit events once the current
+    transaction commits (right away outside of one). The IP address and, unless given,
+    the actor come from the request, which may be None (scripts).
+    """
+    options = get_audit_settings()
+    if not options['ENABLED']:
+        return
+    actor = actor if actor is not None else getattr(request, 'user', None)
+    occurred_at = timezone.now()
+    actor_id = actor.pk if actor is not None and actor.is_authenticated else None
+    ip_address = _get_ip_address(request) if request is not None else None
+    events = [
+        {
+            'occurred_at': occurred_at,
+            'actor_id': actor_id,
+            'action': action,
+            'target_type': target_type,
+            'target_id': target_id,
+            'data': data,
+            'ip_address': ip_address,
+        }
+        for action, target_type, target_id, data in events
+    ]
+    if not events:
+        return
+    if options['SYNC']:
+        transaction.on_commit(lambda: get_audit_writer().write(events))
+    else:
+        transaction.on_commit(lambda: get_audit_writer().put(events, options['BLOCK_TIMEOUT']))
+
+
+def record_event(request, action, target_type, target_id, actor=None, **data):
+    """
+    Record one audit event; see record_events.
+    """
+    record_events(request, [(action, target_type, target_id, data)], actor=actor)
@@ -0,0 +1,296 @@
+# Python Standard Library
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# Third Party Packages
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Local Apps
+from .db_router import primary
+from .revocation import is_token_revoked
+
+User = get_user_model()
+
+USER_STAMP_KEY = 'auth:user-stamp:{user_id}'
+
+# Request attribute holding (raw token, validated token), see decode_access_token
+DECODED_TOKEN_ATTR = '_decoded_access_token'
+
+
+class UserCache:
+    """
+    Process-local TTL / LRU cache of users, keyed by user id (as a string: token claims are strings).
+    Entries carry the shared stamp of the user they were loaded under (see get_cached_user).
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stale = 0
+
+    def get(self, user_id, stamp):
+        """
+        Return the cached user if it is fresh and was loaded under stamp, otherwise None.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, entry_stamp, expires = entry
+            if entry_stamp != stamp or expires <= time.monotonic():
+                del self._entries[user_id]
+                self.stale += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return user
+
+    def set(self, user_id, user, stamp):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (user, stamp, time.monotonic() + self.timeout)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                _user_cache = UserCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TIMEOUT)
+    return _user_cache
+
+
+def _get_user_stamp(user_id):
+    """
+    Return the shared stamp of a user. It changes whenever the user row changes,
+    so the caches of every process drop their copy, not only the one that saved.
+    """
+    key = USER_STAMP_KEY.format(user_id=user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def get_cached_user(user_id):
+    """
+    Return a copy of the user with this id from the user cache, loading it on a miss.
+    Returns None if the user does not exist.
+    """
+    user_cache = get_user_cache()
+    # Read the stamp first: a change after this point makes the loaded copy stale
+    stamp = _get_user_stamp(user_id)
+    user = user_cache.get(user_id, stamp)
+    if user is None:
+        user = primary(User).filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None:
+            return None
+        user_cache.set(user_id, user, stamp)
+    # Views modify request.user (profile update, password change): never hand out the cached instance
+    return copy.copy(user)
+
+
+def invalidate_cached_users(*user_ids):
+    """
+    Drop the cached copies of the given users in every process.
+    """
+    cache.delete_many([USER_STAMP_KEY.format(user_id=user_id) for user_id in user_ids])
+    get_user_cache().discard(*user_ids)
+
+
+def get_user_cache_stats():
+    return get_user_cache().stats()
+
+
+def decode_access_token(request, raw_token):
+    """
+    Validate the raw token sent with a request (signature, expiry, type) once per request:
+    ReplicaRoutingMiddleware and the authentication classes share the result.
+    Raises InvalidToken.
+    """
+    # Set on the Django request, which a DRF request reads through
+    request = getattr(request, '_request', request)
+    decoded = getattr(request, DECODED_TOKEN_ATTR, None)
+    if decoded is None or decoded[0] != raw_token:
+        decoded = (raw_token, JWTAuthentication().get_validated_token(raw_token))
+        setattr(request, DECODED_TOKEN_ATTR, decoded)
+    return decoded[1]
+
+
+def _check_not_revoked(validated_token):
+    if is_token_revoked(validated_token):
+        raise AuthenticationFailed(_('Token is blacklisted'), code='token_not_valid')
+    return validated_token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication resolving users from the user cache instead of a query per request.
+    Inactive users and tokens revoked by a password change are still rejected:
+    saving a user invalidates its cached copy (see api/signals.py).
+    Access tokens revoked at logout are rejected too (see utils/revocation.py).
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = _check_not_revoked(decode_access_token(request, raw_token))
+        return self.get_user(validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        return _check_not_revoked(super().get_validated_token(raw_token))
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+def _last_login_update(user):
+    """
+    Return (queryset, now) to update last_login of the user, or None if it was updated recently.
+    """
+    now = timezone.now()
+    threshold = now - timedelta(seconds=settings.LAST_LOGIN_UPDATE_INTERVAL)
+    if user.last_login is not None and user.last_login > threshold:
+        return None
+
+    queryset = User.objects.filter(
+        Q(last_login__isnull=True) | Q(last_login__lte=threshold),
+        pk=user.pk,
+    )
+    return queryset, now
+
+
+def update_last_login(user):
+    """
+    Update last_login of the user, at most once per LAST_LOGIN_UPDATE_INTERVAL seconds.
+    The interval is checked in the UPDATE itself, so concurrent logins write once.
+    Returns True if the row was updated.
+    """
+    update = _last_login_update(user)
+    if update is None:
+        return False
+
+    queryset, now = update
+    updated = queryset.update(last_login=now)
+    if updated:
+        user.last_login = now
+        # update() sends no post_save signal
+        invalidate_cached_users(user.pk)
+    return bool(updated)
+
+
+async def aupdate_last_login(user):
+    """
+    Async version of update_last_login.
+    """
+    update = _last_login_update(user)
+    if update is None:
+        return False
+
+    queryset, now = update
+    updated = await queryset.aupdate(last_login=now)
+    if updated:
+        user.last_login = now
+        # update() sends no post_save signal; the stamps are in the cache, off the event loop
+        await sync_to_async(invalidate_cached_users)(user.pk)
+    return bool(updated)
+
+
+async def aauthenticate_jwt(request):
+    """
+    Authenticate a plain Django request with a JWT access token, using the async ORM.
+    Returns (user, validated_token), or None if no token was sent.
+    Raises AuthenticationFailed / InvalidToken like JWTAuthentication.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = decode_access_token(request, raw_token)
+    await sync_to_async(_check_not_revoked)(validated_token)
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+    # Primary: a deactivated user or a changed password must take effect at once
+    user = await primary(User).filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+    return user, validated_token
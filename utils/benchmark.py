@@ -0,0 +1,94 @@
+# Python Standard Library
+import asyncio
+import json
+import math
+import time
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return the nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting queries and their wall time.
+    Usage: with connection.execute_wrapper(timer): ...
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.count += 1
+
+
+def summarize_latencies(latencies, elapsed):
+    """
+    Summarize request latencies (seconds) measured over `elapsed` seconds of wall time.
+    """
+    values = sorted(latencies)
+    return {
+        'requests': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+        'max_ms': round((values[-1] if values else 0.0) * 1000, 3),
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def asgi_request(application, method, path, body=None, headers=None):
+    """
+    Send one HTTP request to an ASGI application in-process.
+    Returns (status_code, body_bytes).
+    """
+    payload = json.dumps(body).encode() if body is not None else b''
+    path, _, query_string = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode()),
+            *((name.lower().encode(), value.encode()) for name, value in (headers or {}).items()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects; the application stops listening once it responded
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+
+    await application(scope, receive, send)
+    return response['status'], b''.join(response['body'])
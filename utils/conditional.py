@@ -0,0 +1,75 @@
+# Python Standard Library
+import hashlib
+
+# Django Built-in modules
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Build a compact ETag value from the given parts.
+    """
+    return hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+
+class ConditionalRequestMixin:
+    """
+    Mixin for generic API views adding ETag / Last-Modified validators.
+    GET/HEAD answer 304 before anything is serialized when the client copy is current;
+    PUT/PATCH/DELETE answer 412 when If-Match / If-Unmodified-Since does not match.
+    Views implement get_validators(request) -> (etag, last_modified); either may be None.
+    Validators computed once can be passed to evaluate_conditions / add_validator_headers.
+    """
+
+    def get_validators(self, request):
+        raise NotImplementedError('subclasses of ConditionalRequestMixin must provide a get_validators() method')
+
+    def evaluate_conditions(self, request, validators=None):
+        """
+        Return a 304 / 412 response if the request preconditions say so, otherwise None.
+        """
+        etag, last_modified = validators or self.get_validators(request)
+        response = get_conditional_response(
+            request,
+            etag=quote_etag(etag) if etag else None,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None and response.status_code == 304:
+            self._set_validator_headers(response, etag, last_modified)
+        return response
+
+    def add_validator_headers(self, request, response, validators=None):
+        """
+        Add ETag / Last-Modified headers of the current state to a successful response.
+        """
+        if 200 <= response.status_code < 300:
+            self._set_validator_headers(response, *(validators or self.get_validators(request)))
+        return response
+
+    def _set_validator_headers(self, response, etag, last_modified):
+        if etag:
+            response.headers['ETag'] = quote_etag(etag)
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+
+    def list(self, request, *args, **kwargs):
+        # Reading does not change the state: compute the validators once
+        validators = self.get_validators(request)
+        return self.evaluate_conditions(request, validators) or self.add_validator_headers(
+            request, super().list(request, *args, **kwargs), validators
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_validators(request)
+        return self.evaluate_conditions(request, validators) or self.add_validator_headers(
+            request, super().retrieve(request, *args, **kwargs), validators
+        )
+
+    def update(self, request, *args, **kwargs):
+        return self.evaluate_conditions(request) or self.add_validator_headers(
+            request, super().update(request, *args, **kwargs)
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        return self.evaluate_conditions(request) or super().destroy(request, *args, **kwargs)
@@ -0,0 +1,21 @@
+# Python Standard Library
+import re
+
+# SQLite: "UNIQUE constraint failed: auth_user.username" or "UNIQUE constraint failed: index 'name'"
+_SQLITE_UNIQUE_RE = re.compile(r"^UNIQUE constraint failed: (?:index '(?P<index>[^']+)'|(?P<columns>.+))$")
+
+
+def get_constraint_name(error):
+    """
+    Return the name of the constraint violated by an IntegrityError, or None.
+    PostgreSQL reports the constraint / index name; SQLite reports the index name
+    for unique indexes and "table.column" for column constraints.
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name
+
+    match = _SQLITE_UNIQUE_RE.match(str(error))
+    if match is None:
+        return None
+    return match.group('index') or match.group('columns')
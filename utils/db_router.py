@@ -0,0 +1,79 @@
+# Python Standard Library
+import contextvars
+import random
+from contextlib import contextmanager
+
+# Django Built-in modules
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# True while the current request must read from the primary database
+_use_primary = contextvars.ContextVar('use_primary_database', default=False)
+
+# Apps whose reads must always see the latest writes
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def pin_to_primary(value=True):
+    """
+    Route reads of the current context to the primary database.
+    Returns a token for reset_primary_pin().
+    """
+    return _use_primary.set(value)
+
+
+def reset_primary_pin(token):
+    _use_primary.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Route the reads of the block to the primary database; for data that is cached
+    afterwards (see primary()).
+    """
+    token = pin_to_primary()
+    try:
+        yield
+    finally:
+        reset_primary_pin(token)
+
+
+def primary(model):
+    """
+    Return the default manager of model on the primary database.
+    Loaders of cached state read through it: a lagging replica would otherwise put
+    stale data in the cache for its whole TTL.
+    """
+    return model._default_manager.db_manager(DEFAULT_DB_ALIAS)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending safe reads to DATABASE_REPLICAS and everything else to the primary.
+    Reads stay on the primary while pinned (see utils.middleware.ReplicaRoutingMiddleware)
+    and inside a transaction on the primary.
+    Loaders of cached state (users, role masks and catalog, revoked tokens, cached pages)
+    read the primary explicitly with primary() / primary_reads().
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _use_primary.get()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
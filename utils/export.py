@@ -0,0 +1,236 @@
+# Python Standard Library
+import csv
+import datetime
+import itertools
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+# Third Party Packages
+from asgiref.sync import sync_to_async
+
+# Content type of each export format
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+USER_EXPORT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff',
+    'date_joined', 'last_login', 'roles',
+)
+USER_ROLE_EXPORT_FIELDS = (
+    'id', 'user_id', 'username', 'role_id', 'role_code', 'is_active', 'suspended_by_role', 'created',
+)
+ROLE_EXPORT_FIELDS = (
+    'id', 'code', 'name', 'parent_id', 'is_active', 'bit', 'created',
+)
+
+# Encoded rows are sent in chunks of about this many characters
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+def get_export_chunk_size():
+    """
+    Return the number of rows fetched from the database at a time.
+    """
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def _implying_role_ids(role_code):
+    """
+    Subquery of the ids of the role with the code and of the roles inheriting from it.
+    """
+    # Import here to avoid circular imports
+    from api.models import RoleClosure
+
+    return RoleClosure.objects.filter(ancestor__code=role_code).values('descendant_id')
+
+
+def _role_codes_decoder():
+    """
+    Return a function from a role mask to the codes of its roles (see UserRoleMask).
+    Users share few distinct masks, so each one is decoded once.
+    """
+    # Import here to avoid circular imports
+    from api.models import Role
+
+    bits = list(Role.objects.filter(bit__isnull=False).order_by('bit').values_list('bit', 'code'))
+    decoded = {0: []}
+
+    def decode(mask):
+        codes = decoded.get(mask)
+        if codes is None:
+            codes = decoded[mask] = [code for bit, code in bits if mask >> bit & 1]
+        return codes
+
+    return decode
+
+
+def iter_users(chunk_size, role=None, is_active=None, since=None, until=None):
+    """
+    Users ordered by id with the codes of their active roles, read from the role masks.
+    role: users holding the role (directly or through inheritance); since/until: date_joined range.
+    """
+    # Import here to avoid circular imports
+    from api.models import UserRoleMask
+    from .roles import get_required_role_mask
+
+    queryset = get_user_model().objects.order_by('id')
+    if role is not None:
+        required = get_required_role_mask([role])
+        queryset = queryset.filter(pk__in=UserRoleMask.objects.with_any_role(required).values('user_id'))
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if since is not None:
+        queryset = queryset.filter(date_joined__gte=since)
+    if until is not None:
+        queryset = queryset.filter(date_joined__lt=until)
+
+    decode = _role_codes_decoder()
+    rows = queryset.values(*USER_EXPORT_FIELDS[:-1], mask=F('role_mask__mask'))
+    for row in rows.iterator(chunk_size=chunk_size):
+        row['roles'] = decode(row.pop('mask') or 0)
+        yield row
+
+
+def iter_user_roles(chunk_size, role=None, is_active=None, since=None, until=None):
+    """
+    User roles ordered by id.
+    role: assignments granting the role (directly or through inheritance); since/until: created range.
+    """
+    # Import here to avoid circular imports
+    from api.models import UserRole
+
+    queryset = UserRole.objects.order_by('id')
+    if role is not None:
+        queryset = queryset.filter(role_id__in=_implying_role_ids(role))
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if since is not None:
+        queryset = queryset.filter(created__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created__lt=until)
+
+    rows = queryset.values(
+        'id', 'user_id', 'role_id', 'is_active', 'suspended_by_role', 'created',
+        username=F('user__username'), role_code=F('role__code'),
+    )
+    yield from rows.iterator(chunk_size=chunk_size)
+
+
+def iter_roles(chunk_size, role=None, is_active=None, since=None, until=None):
+    """
+    Roles ordered by id.
+    role: the role and the roles inheriting from it; since/until: created range.
+    """
+    # Import here to avoid circular imports
+    from api.models import Role
+
+    queryset = Role.objects.order_by('id')
+    if role is not None:
+        queryset = queryset.filter(id__in=_implying_role_ids(role))
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if since is not None:
+        queryset = queryset.filter(created__gte=since)
+    if until is not None:
+        queryset = queryset.filter(created__lt=until)
+    yield from queryset.values(*ROLE_EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+# Dataset name: (fields, row iterator)
+EXPORT_DATASETS = {
+    'users': (USER_EXPORT_FIELDS, iter_users),
+    'user-roles': (USER_ROLE_EXPORT_FIELDS, iter_user_roles),
+    'roles': (ROLE_EXPORT_FIELDS, iter_roles),
+}
+
+
+def _buffered(lines, buffer_size):
+    """
+    Join encoded lines into UTF-8 chunks of about buffer_size characters.
+    """
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def iter_ndjson(rows, fields, buffer_size=EXPORT_BUFFER_SIZE):
+    """
+    Encode rows as newline delimited JSON, one object per row.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    return _buffered(
+        (encoder.encode({field: row[field] for field in fields}) + '\n' for row in rows),
+        buffer_size,
+    )
+
+
+class _Echo:
+    """
+    File-like object returning what is written, to get csv.writer lines one by one.
+    """
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ' '.join(value)
+    return value
+
+
+def iter_csv(rows, fields, buffer_size=EXPORT_BUFFER_SIZE):
+    """
+    Encode rows as CSV with a header line; lists (role codes) are space separated.
+    """
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow([_csv_value(row[field]) for field in fields]) for row in rows)
+    return _buffered(itertools.chain([writer.writerow(fields)], lines), buffer_size)
+
+
+def stream_export(dataset, file_format, chunk_size=None, **filters):
+    """
+    Return an iterator of the encoded bytes of a dataset export.
+    Rows are fetched chunk_size at a time and encoded as they come, so memory use does
+    not depend on the number of rows. Nothing is queried until the iterator is consumed.
+    """
+    fields, iter_rows = EXPORT_DATASETS[dataset]
+    rows = iter_rows(chunk_size or get_export_chunk_size(), **filters)
+    encode = iter_ndjson if file_format == 'ndjson' else iter_csv
+    return encode(rows, fields)
+
+
+async def aiter_export(chunks):
+    """
+    Async iterator over the chunks of stream_export, for ASGI: Django buffers a sync
+    streaming body there. Each chunk is read in the thread that runs sync code
+    (thread_sensitive), which holds the database cursor.
+    """
+    read = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while True:
+            chunk = await read(chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        # Client gone or export done: release the cursor in the same thread
+        await sync_to_async(chunks.close, thread_sensitive=True)()
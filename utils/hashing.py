@@ -0,0 +1,44 @@
+# Python Standard Library
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_password_executor():
+    """
+    Return the bounded thread pool used for password hashing.
+    PBKDF2 releases the GIL, so hashing runs in parallel without blocking the event loop.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix='password-hashing',
+                )
+    return _executor
+
+
+async def amake_password(password):
+    """
+    Hash a password on the password hashing executor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), make_password, password)
+
+
+async def acheck_password(password, encoded):
+    """
+    Check a password against an encoded hash on the password hashing executor.
+    Unlike User.check_password, the hash is never upgraded, so no query runs off the request.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), check_password, password, encoded)
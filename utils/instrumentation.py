@@ -0,0 +1,152 @@
+# Python Standard Library
+import bisect
+import contextvars
+import heapq
+import threading
+import time
+
+# Django Built-in modules
+from django.conf import settings
+
+# Upper bounds (ms) of the per-route latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+DEFAULT_INSTRUMENTATION = {
+    'ENABLED': False,
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_MS': 500,
+    'MAX_QUERIES': 20,
+    'LOGGED_QUERIES': 5,
+}
+
+_route_stats = {}
+_route_stats_lock = threading.Lock()
+
+# Instrumentation state of the current request (see utils.middleware.RequestInstrumentationMiddleware)
+_request_state = contextvars.ContextVar('request_instrumentation', default=None)
+
+
+def get_instrumentation_settings():
+    """
+    Return the REQUEST_INSTRUMENTATION setting merged over the defaults.
+    """
+    return {**DEFAULT_INSTRUMENTATION, **getattr(settings, 'REQUEST_INSTRUMENTATION', {})}
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording query count and time of one request.
+    Only the slowest `keep` statements (without parameters) and per-statement counts are kept.
+    """
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.count = 0
+        self.elapsed = 0.0
+        self.slowest = []
+        self.repeats = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.elapsed += duration
+            self.count += 1
+            self.repeats[sql] = self.repeats.get(sql, 0) + 1
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, (duration, self.count, sql))
+            elif self.slowest and duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (duration, self.count, sql))
+
+    def get_slowest(self):
+        """
+        Return [(duration_ms, sql)] of the slowest statements, slowest first.
+        """
+        return [(round(duration * 1000, 3), sql) for duration, _, sql in sorted(self.slowest, reverse=True)]
+
+    def get_repeated(self):
+        """
+        Return [(count, sql)] of statements run more than once, most repeated first.
+        """
+        repeated = sorted(((count, sql) for sql, count in self.repeats.items() if count > 1), reverse=True)
+        return repeated[:self.keep]
+
+
+def set_request_state(state):
+    """
+    Make state the instrumentation state of the current context (None to clear it).
+    """
+    _request_state.set(state)
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding the time spent in to_representation to the serializer time
+    of the current request. Nested serializers are counted in the outermost one.
+    """
+
+    def to_representation(self, instance):
+        state = _request_state.get()
+        if state is None or state['serializing']:
+            return super().to_representation(instance)
+        state['serializing'] = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            state['serializer_time'] += time.perf_counter() - start
+            state['serializing'] = False
+
+
+def record_route(route, duration, query_count, sql_time, serializer_time=0.0):
+    """
+    Add one request to the in-memory histogram of its route.
+    """
+    bucket = bisect.bisect_left(HISTOGRAM_BUCKETS_MS, duration * 1000)
+    with _route_stats_lock:
+        stats = _route_stats.get(route)
+        if stats is None:
+            stats = _route_stats[route] = {
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'queries': 0,
+                'sql_ms': 0.0,
+                'serializer_ms': 0.0,
+                'buckets': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+            }
+        stats['count'] += 1
+        stats['total_ms'] += duration * 1000
+        stats['max_ms'] = max(stats['max_ms'], duration * 1000)
+        stats['queries'] += query_count
+        stats['sql_ms'] += sql_time * 1000
+        stats['serializer_ms'] += serializer_time * 1000
+        stats['buckets'][bucket] += 1
+
+
+def get_route_stats():
+    """
+    Return the per-route histograms of this process.
+    """
+    labels = [f'le_{bound}' for bound in HISTOGRAM_BUCKETS_MS] + ['inf']
+    with _route_stats_lock:
+        snapshot = {route: {**stats, 'buckets': list(stats['buckets'])} for route, stats in _route_stats.items()}
+    return {
+        route: {
+            'count': stats['count'],
+            'avg_ms': round(stats['total_ms'] / stats['count'], 3),
+            'max_ms': round(stats['max_ms'], 3),
+            'avg_queries': round(stats['queries'] / stats['count'], 2),
+            'avg_sql_ms': round(stats['sql_ms'] / stats['count'], 3),
+            'avg_serializer_ms': round(stats['serializer_ms'] / stats['count'], 3),
+            'histogram_ms': dict(zip(labels, stats['buckets'])),
+        }
+        for route, stats in snapshot.items()
+    }
+
+
+def reset_route_stats():
+    with _route_stats_lock:
+        _route_stats.clear()
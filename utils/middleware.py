@@ -1,6 +1,27 @@
+# Python Standard Library
+import logging
+import time
+
 # Django Built-in modules
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 
+# Third Party Packages
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Local Apps
+from .authentication import decode_access_token
+from .db_router import pin_to_primary, reset_primary_pin
+from .instrumentation import QueryRecorder, get_instrumentation_settings, record_route, set_request_state
+
+instrumentation_logger = logging.getLogger('utils.instrumentation')
+
 
 class DisableCSRFForAPI(MiddlewareMixin):
     """
@@ -15,3 +36,149 @@ class DisableCSRFForAPI(MiddlewareMixin):
             setattr(request, '_dont_enforce_csrf_checks', True)
         return None
 
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Middleware to choose between the primary database and the read replicas.
+    Unsafe requests read from the primary. After one, reads of the same client stay
+    on the primary for REPLICA_PIN_SECONDS so it reads its own writes.
+    """
+    def process_request(self, request):
+        """
+        Pin reads to the primary for unsafe requests and recent writers.
+        """
+        if not settings.DATABASE_REPLICAS:
+            return None
+        request._replica_identity = self._get_identity(request)
+        pinned = request.method not in SAFE_METHODS or (
+            request._replica_identity is not None
+            and cache.get(self._pin_key(request._replica_identity)) is not None
+        )
+        request._replica_pin_token = pin_to_primary(pinned)
+        return None
+
+    def process_response(self, request, response):
+        """
+        Remember writers and release the pin.
+        """
+        token = getattr(request, '_replica_pin_token', None)
+        if token is None:
+            return response
+        if request.method not in SAFE_METHODS and request._replica_identity is not None:
+            cache.set(self._pin_key(request._replica_identity), True, settings.REPLICA_PIN_SECONDS)
+        reset_primary_pin(token)
+        return response
+
+    def _pin_key(self, identity):
+        return f'db:primary-pin:{identity}'
+
+    def _get_identity(self, request):
+        """
+        Identify the client without a database query: JWT user id, else session key.
+        The decoded token is kept on the request for the authentication classes.
+        """
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is not None:
+            try:
+                validated_token = decode_access_token(request, raw_token)
+                return f'user:{validated_token[api_settings.USER_ID_CLAIM]}'
+            except (InvalidToken, KeyError):
+                return None
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        return f'session:{session_key}' if session_key else None
+
+
+class RequestInstrumentationMiddleware(MiddlewareMixin):
+    """
+    Middleware recording query count, SQL time, view time, serializer time and render time
+    of each request. The view time includes the serializer time of serializers using
+    TimedSerializerMixin, which is also reported on its own. They are sent as Server-Timing headers and aggregated in per-route histograms
+    (see utils/instrumentation.py). Slow requests and requests with too many queries are
+    logged with their slowest and repeated SQL. Configured by REQUEST_INSTRUMENTATION.
+    """
+    def __init__(self, get_response):
+        self.options = get_instrumentation_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        """
+        Start the clock and attach a query recorder to every database connection.
+        """
+        recorder = QueryRecorder(self.options['LOGGED_QUERIES'])
+        for connection in connections.all():
+            connection.execute_wrappers.append(recorder)
+        request._instrumentation = {
+            'recorder': recorder,
+            'start': time.perf_counter(),
+            'view_start': None,
+            'view_end': None,
+            'render_end': None,
+            'serializer_time': 0.0,
+            'serializing': False,
+        }
+        set_request_state(request._instrumentation)
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = getattr(request, '_instrumentation', None)
+        if state is not None:
+            state['view_start'] = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        """
+        The view returned a lazily rendered response (DRF Response): time its rendering separately.
+        """
+        state = getattr(request, '_instrumentation', None)
+        if state is not None:
+            state['view_end'] = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: state.update(render_end=time.perf_counter()))
+        return response
+
+    def process_response(self, request, response):
+        """
+        Detach the recorder, then report and record the request timings.
+        """
+        state = getattr(request, '_instrumentation', None)
+        if state is None:
+            return response
+        end = time.perf_counter()
+        set_request_state(None)
+        recorder = state['recorder']
+        for connection in connections.all():
+            if recorder in connection.execute_wrappers:
+                connection.execute_wrappers.remove(recorder)
+
+        total = end - state['start']
+        view = (state['view_end'] or end) - state['view_start'] if state['view_start'] else 0.0
+        render = state['render_end'] - state['view_end'] if state['render_end'] and state['view_end'] else 0.0
+        match = request.resolver_match
+        route = f"{request.method} /{match.route if match else '<unresolved>'}"
+        serializer = state['serializer_time']
+        record_route(route, total, recorder.count, recorder.elapsed, serializer)
+
+        if self.options['SERVER_TIMING']:
+            timings = (
+                f'db;dur={recorder.elapsed * 1000:.3f};desc="{recorder.count} queries", '
+                f'view;dur={view * 1000:.3f}, serializer;dur={serializer * 1000:.3f}, render;dur={render * 1000:.3f}, total;dur={total * 1000:.3f}'
+            )
+            existing = response.headers.get('Server-Timing')
+            response.headers['Server-Timing'] = f'{existing}, {timings}' if existing else timings
+
+        if total * 1000 > self.options['SLOW_REQUEST_MS'] or recorder.count > self.options['MAX_QUERIES']:
+            self._log_request(request, route, response, total, recorder, serializer)
+        return response
+
+    def _log_request(self, request, route, response, total, recorder, serializer):
+        lines = [
+            f'{route} ({request.path}) -> {response.status_code}: {total * 1000:.1f} ms, '
+            f'{recorder.count} queries, {recorder.elapsed * 1000:.1f} ms SQL, {serializer * 1000:.1f} ms serializer'
+        ]
+        lines += [f'  slowest {duration} ms: {sql}' for duration, sql in recorder.get_slowest()]
+        lines += [f'  repeated {count}x: {sql}' for count, sql in recorder.get_repeated()]
+        instrumentation_logger.warning('\n'.join(lines))
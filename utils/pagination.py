@@ -0,0 +1,123 @@
+# Python Standard Library
+import json
+
+# Django Built-in modules
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Third Party Packages
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination with a client-selected page size.
+    Usage: ?page=2&page_size=100
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination on the whole ordering tuple, e.g. (created, id).
+    DRF's CursorPagination only filters on the first ordering field and pages rows tied
+    on it by OFFSET (capped at offset_cutoff). Here the cursor holds the values of every
+    ordering field of the last row and the next page is the rows after that tuple, so
+    ties cost nothing. The last ordering field must be unique (the primary key).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor is not None else None
+
+        ordering = [self._reverse(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            try:
+                values = json.loads(current_position)
+                if not isinstance(values, list) or len(values) != len(ordering):
+                    raise ValueError
+                queryset = queryset.filter(self._after(ordering, values))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # One extra row tells whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+        self.has_next = has_following if not reverse else current_position is not None
+        self.has_previous = has_following if reverse else current_position is not None
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            # Past either end: the way back starts from the cursor itself
+            self.next_position = self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values)
+
+    def _reverse(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, ordering, values):
+        """
+        Rows after the tuple of values in the ordering, e.g. for ('-created', '-id'):
+        created <= x AND (created < x OR id < y). The leading range keeps the index usable.
+        """
+        name, value = ordering[0].lstrip('-'), values[0]
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        after = Q(**{f'{name}__{lookup}': value})
+        if len(ordering) == 1:
+            return after
+        return Q(**{f'{name}__{lookup}e': value}) & (after | self._after(ordering[1:], values[1:]))
+
+
+class CreatedCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination on (created, id), newest first.
+    Every page costs the same as the first one: no COUNT(*) and no OFFSET scan.
+    The paginated queryset should be backed by an index on (-created, -id).
+    Usage: pagination_class = CreatedCursorPagination
+    """
+    ordering = ('-created', '-id')
+
+
+class OccurredCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination on (occurred_at, id), newest first (audit events).
+    Events recorded together (e.g. a bulk assignment) share occurred_at.
+    """
+    ordering = ('-occurred_at', '-id')
@@ -2,6 +2,9 @@
 from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 
+# Local Apps
+from .roles import request_has_any_role
+
 
 class AllowAnyWithAPIKey(BasePermission):
     """
@@ -27,28 +30,23 @@ class IsAuthenticatedWithAPIKey(BasePermission):
 
 class HasRole(BasePermission):
     """
-    Permission class to check if user has a specific role.
+    Permission class to check if user has a specific role (directly or inherited).
     Usage: permission_classes = [HasRole('admin')]
     """
     def __init__(self, role_code):
         self.role_code = role_code
 
+    def __call__(self):
+        """
+        DRF instantiates every entry of permission_classes; return the configured instance.
+        """
+        return self
+
     def has_permission(self, request, view):
         """
         Check if user has the required role.
         """
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        # Import here to avoid circular imports
-        from api.models import UserRole
-        
-        return UserRole.objects.filter(
-            user=request.user,
-            role__code=self.role_code,
-            is_active=True,
-            role__is_active=True
-        ).exists()
+        return request_has_any_role(request, (self.role_code,))
 
 
 class HasAnyRole(BasePermission):
@@ -59,20 +57,15 @@ class HasAnyRole(BasePermission):
     def __init__(self, role_codes):
         self.role_codes = role_codes
 
+    def __call__(self):
+        """
+        DRF instantiates every entry of permission_classes; return the configured instance.
+        """
+        return self
+
     def has_permission(self, request, view):
         """
         Check if user has any of the required roles.
         """
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        # Import here to avoid circular imports
-        from api.models import UserRole
-        
-        return UserRole.objects.filter(
-            user=request.user,
-            role__code__in=self.role_codes,
-            is_active=True,
-            role__is_active=True
-        ).exists()
+        return request_has_any_role(request, self.role_codes)
 
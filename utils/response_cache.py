@@ -0,0 +1,118 @@
+# Python Standard Library
+import gzip
+import hashlib
+from urllib.parse import urlencode
+
+# Django Built-in modules
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    # Optional: without it only gzip and identity are served
+    import brotli
+except ImportError:
+    brotli = None
+
+# Best first; identity is always available
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def get_response_cache_timeout():
+    """
+    Return the TTL (in seconds) of cached responses.
+    Entries are keyed on a version, so the TTL only bounds memory use.
+    """
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+
+
+def parse_accept_encoding(header):
+    """
+    Return {coding: q} of an Accept-Encoding header.
+    """
+    accepted = {}
+    for part in header.split(','):
+        coding, *params = part.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(request):
+    """
+    Return the best content coding the client accepts: br, gzip or identity.
+    """
+    accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for coding in ENCODINGS:
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return 'identity'
+
+
+def encode_body(body):
+    """
+    Return {coding: bytes} of a body in every supported coding.
+    Compressed once per cache entry, so the highest levels are used.
+    """
+    encoded = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(body, quality=11)
+    return encoded
+
+
+def normalize_query(request):
+    """
+    Return the query string with parameters in a stable order.
+    """
+    return urlencode(sorted((key, value) for key in request.GET for value in request.GET.getlist(key)))
+
+
+def make_response_cache_key(prefix, version, request, coding):
+    """
+    Key of a cached response: the absolute URL matters because pagination links are absolute.
+    """
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{normalize_query(request)}'
+    return f'response:{prefix}:{version}:{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}:{coding}'
+
+
+def get_cached_response(prefix, version, request):
+    """
+    Return the cached (body, content_encoding, validators) entry for the request, or None.
+    """
+    return cache.get(make_response_cache_key(prefix, version, request, negotiate_encoding(request)))
+
+
+def store_response(prefix, version, request, body, validators=None):
+    """
+    Cache a rendered body in every coding; return the entry for the coding the client accepts.
+    """
+    entries = {
+        make_response_cache_key(prefix, version, request, coding): (encoded, coding, validators)
+        for coding, encoded in encode_body(body).items()
+    }
+    cache.set_many(entries, get_response_cache_timeout())
+    return entries[make_response_cache_key(prefix, version, request, negotiate_encoding(request))]
+
+
+def build_response(entry, content_type):
+    """
+    Return an HttpResponse of a cached entry; the stored bytes are written as they are.
+    """
+    body, coding, _validators = entry
+    response = HttpResponse(body, content_type=content_type)
+    if coding != 'identity':
+        response.headers['Content-Encoding'] = coding
+    response.headers['Content-Length'] = str(len(body))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,211 @@
+# Python Standard Library
+import hashlib
+import math
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+# Django Built-in modules
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+# Third Party Packages
+from rest_framework_simplejwt.settings import api_settings
+
+# Local Apps
+from .db_router import primary
+
+# Changes whenever a token is revoked, so every process syncs its filter right away
+REVOCATION_STAMP_KEY = 'auth:revocation-stamp'
+
+# Rows committed out of created order are picked up by re-reading this window on every sync
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """
+    Bloom filter of strings: no false negatives, false positives at about error_rate
+    while it holds at most capacity items.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """
+    Revoked token ids: a process-local Bloom filter in front of the RevokedToken table.
+    A token that is not in the filter is not revoked and costs no query; a filter hit is
+    confirmed in the database. The filter syncs incrementally when the shared stamp changes
+    (or every sync_interval seconds, for caches not shared between processes).
+    """
+
+    def __init__(self, capacity, error_rate, sync_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_until = None
+        self._stamp = None
+        self._next_sync = 0.0
+
+    def _ensure_synced(self):
+        stamp = cache.get(REVOCATION_STAMP_KEY)
+        if self._bloom is not None and stamp == self._stamp and time.monotonic() < self._next_sync:
+            return
+        with self._lock:
+            self._sync(stamp)
+
+    def _sync(self, stamp):
+        # Import here to avoid circular imports
+        from api.models import RevokedToken
+
+        now = timezone.now()
+        # Primary: a revocation missing on a lagging replica would stay out of the filter
+        queryset = primary(RevokedToken).filter(expires_at__gt=now)
+        if self._bloom is None or self._bloom.count > self._bloom.capacity:
+            # (Re)build, sized for the live rows so the error rate holds
+            jtis = list(queryset.values_list('jti', flat=True))
+            bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        else:
+            bloom = self._bloom
+            jtis = queryset.filter(created__gte=self._synced_until - SYNC_OVERLAP).values_list('jti', flat=True)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._synced_until = now
+        self._stamp = stamp
+        self._next_sync = time.monotonic() + self.sync_interval
+
+    def might_be_revoked(self, jti):
+        """
+        Return False if the token is certainly not revoked (no database query).
+        """
+        self._ensure_synced()
+        return jti in self._bloom
+
+    def is_revoked(self, jti):
+        # Import here to avoid circular imports
+        from api.models import RevokedToken
+
+        return self.might_be_revoked(jti) and primary(RevokedToken).filter(jti=jti).exists()
+
+    def revoke(self, tokens):
+        """
+        Revoke (jti, expires_at) pairs with a single INSERT; already revoked ids are ignored.
+        """
+        # Import here to avoid circular imports
+        from api.models import RevokedToken
+
+        tokens = dict(tokens)
+        RevokedToken.objects.bulk_create([
+            RevokedToken(jti=jti, expires_at=expires_at)
+            for jti, expires_at in tokens.items()
+        ], ignore_conflicts=True)
+        self._added(tokens)
+
+    def revoke_once(self, jti, expires_at):
+        """
+        Revoke one token; return False if it was already revoked (e.g. a concurrent rotation won).
+        """
+        # Import here to avoid circular imports
+        from api.models import RevokedToken
+
+        _, created = RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+        self._added([jti])
+        return created
+
+    def _added(self, jtis):
+        self._ensure_synced()
+        with self._lock:
+            for jti in jtis:
+                self._bloom.add(jti)
+        transaction.on_commit(lambda: cache.set(REVOCATION_STAMP_KEY, uuid.uuid4().hex, None))
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_revocation_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RevocationStore(
+                    settings.REVOCATION_BLOOM_CAPACITY,
+                    settings.REVOCATION_BLOOM_ERROR_RATE,
+                    settings.REVOCATION_SYNC_INTERVAL,
+                )
+    return _store
+
+
+def token_expiry(token):
+    """
+    Return the expiry of a validated token as an aware datetime.
+    """
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+
+def is_token_revoked(token):
+    """
+    Return True if the validated token was revoked. Usually answered without a query.
+    """
+    return get_revocation_store().is_revoked(token[api_settings.JTI_CLAIM])
+
+
+def revoke_tokens(*tokens):
+    """
+    Revoke validated tokens (refresh or access) until they expire.
+    """
+    get_revocation_store().revoke((token[api_settings.JTI_CLAIM], token_expiry(token)) for token in tokens)
+
+
+def revoke_token_once(token):
+    """
+    Revoke a validated token; return False if it was already revoked.
+    """
+    return get_revocation_store().revoke_once(token[api_settings.JTI_CLAIM], token_expiry(token))
+
+
+def prune_revoked_tokens(batch_size=10000):
+    """
+    Delete expired revocations in batches; return the number of deleted rows.
+    Expired tokens are rejected by their exp claim anyway.
+    """
+    # Import here to avoid circular imports
+    from api.models import RevokedToken
+
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(RevokedToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,309 @@
+# Python Standard Library
+import time
+import uuid
+from collections import defaultdict
+
+# Django Built-in modules
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Local Apps
+from .db_router import primary
+
+ROLE_CACHE_GENERATION_KEY = 'roles:generation'
+REQUEST_ROLE_MASK_ATTR = '_role_mask'
+
+
+def get_role_cache_timeout():
+    """
+    Return the TTL (in seconds) of cached role codes.
+    """
+    return getattr(settings, 'ROLE_CACHE_TIMEOUT', 300)
+
+
+def _get_generation():
+    """
+    Return the current role cache generation.
+    The generation is time based, so a cache eviction never brings back an old value.
+    """
+    generation = cache.get(ROLE_CACHE_GENERATION_KEY)
+    if generation is None:
+        cache.add(ROLE_CACHE_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(ROLE_CACHE_GENERATION_KEY)
+    return generation
+
+
+def get_role_generation():
+    """
+    Return the role cache generation; it changes whenever any role changes.
+    Caches derived from the role table key on it.
+    """
+    return _get_generation()
+
+
+def _user_cache_key(generation, user_id):
+    return f'roles:{generation}:user:{user_id}'
+
+
+def _catalog_key(generation):
+    return f'roles:{generation}:catalog'
+
+
+def _user_mask_key(generation, user_id):
+    return f'roles:{generation}:mask:{user_id}'
+
+
+def _user_version_key(user_id):
+    return f'roles:version:user:{user_id}'
+
+
+def _get_user_version(user_id):
+    """
+    Return the roles version of a user.
+    A missing version is replaced by a random one, so a validator (profile ETag)
+    computed before an eviction becomes stale instead of matching by mistake.
+    """
+    key = _user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _get_cached_role_codes(generation, user_id):
+    key = _user_cache_key(generation, user_id)
+    role_codes = cache.get(key)
+    if role_codes is None:
+        role_codes = load_user_role_codes(user_id, generation)
+        cache.set(key, role_codes, get_role_cache_timeout())
+    return role_codes
+
+
+def get_role_catalog(generation=None):
+    """
+    Return {role_id: frozenset of implied codes} of the active roles, cached per generation.
+    A role implies its own code and the codes of its active ancestors (see RoleClosure).
+    """
+    # Import here to avoid circular imports
+    from api.models import Role, RoleClosure
+
+    key = _catalog_key(_get_generation() if generation is None else generation)
+    catalog = cache.get(key)
+    if catalog is None:
+        implied = {
+            role_id: {code}
+            for role_id, code in primary(Role).filter(is_active=True).values_list('id', 'code')
+        }
+        for role_id, code in primary(RoleClosure).filter(
+            depth__gt=0,
+            descendant__is_active=True,
+            ancestor__is_active=True,
+        ).values_list('descendant_id', 'ancestor__code'):
+            implied[role_id].add(code)
+        catalog = {role_id: frozenset(codes) for role_id, codes in implied.items()}
+        cache.set(key, catalog, get_role_cache_timeout())
+    return catalog
+
+
+def load_user_role_codes(user_id, generation=None):
+    """
+    Load the effective role codes of a user: assigned active roles and their ancestors.
+    Deactivating a role deactivates its user roles too (see Role.set_active), so this
+    reads only the user role rows; codes come from the cached role catalog.
+    """
+    # Import here to avoid circular imports
+    from api.models import UserRole
+
+    catalog = get_role_catalog(generation)
+    role_ids = primary(UserRole).filter(
+        user_id=user_id, is_active=True,
+    ).values_list('role_id', flat=True)
+    return frozenset().union(*(catalog[role_id] for role_id in role_ids if role_id in catalog))
+
+
+# (generation, {code: mask of the roles implying it}) of this process
+_required_masks = (None, {})
+
+
+def get_required_role_mask(role_codes, generation=None):
+    """
+    Return the mask of the role bits that imply any of the codes (the roles themselves
+    and the roles inheriting from them). Computed once per generation and process.
+    """
+    # Import here to avoid circular imports
+    from api.models import Role
+
+    global _required_masks
+    generation = _get_generation() if generation is None else generation
+    memo_generation, masks = _required_masks
+    if memo_generation != generation:
+        catalog = get_role_catalog(generation)
+        bits = dict(primary(Role).filter(
+            id__in=list(catalog), bit__isnull=False,
+        ).values_list('id', 'bit'))
+        masks = defaultdict(int)
+        for role_id, codes in catalog.items():
+            if role_id in bits:
+                for code in codes:
+                    masks[code] |= 1 << bits[role_id]
+        masks = dict(masks)
+        _required_masks = (generation, masks)
+    required = 0
+    for code in role_codes:
+        required |= masks.get(code, 0)
+    return required
+
+
+def get_user_role_mask(user_id, generation=None):
+    """
+    Return the role mask of a user (see UserRoleMask), using the shared cache.
+    """
+    # Import here to avoid circular imports
+    from api.models import UserRoleMask
+
+    key = _user_mask_key(_get_generation() if generation is None else generation, user_id)
+    mask = cache.get(key)
+    if mask is None:
+        mask = primary(UserRoleMask).filter(
+            user_id=user_id,
+        ).values_list('mask', flat=True).first() or 0
+        cache.set(key, mask, get_role_cache_timeout())
+    return mask
+
+
+def request_has_any_role(request, role_codes):
+    """
+    Return True if the request user effectively holds any of the roles: a bitwise AND
+    of the user's role mask (memoized on the request) and the roles implying the codes.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+
+    generation = _get_generation()
+    memo = getattr(request, REQUEST_ROLE_MASK_ATTR, None)
+    if memo is not None and memo[0] == user.pk:
+        mask = memo[1]
+    else:
+        mask = get_user_role_mask(user.pk, generation)
+        setattr(request, REQUEST_ROLE_MASK_ATTR, (user.pk, mask))
+    return bool(mask & get_required_role_mask(role_codes, generation))
+
+
+def compute_role_masks(**user_filter):
+    """
+    Compute {user_id: mask} from the active user roles in the database (no cache).
+    user_filter selects the users, e.g. user_id__in=[...] or user_id__gte=first, user_id__lte=last.
+    """
+    # Import here to avoid circular imports
+    from api.models import UserRole
+
+    masks = defaultdict(int)
+    # Primary: the masks are written from this (see sync_role_masks)
+    for user_id, bit in primary(UserRole).filter(
+        is_active=True,
+        role__is_active=True,
+        role__bit__isnull=False,
+        **user_filter,
+    ).values_list('user_id', 'role__bit'):
+        masks[user_id] |= 1 << bit
+    return masks
+
+
+def _lock_users(**user_filter):
+    """
+    Lock the rows of the selected users (SELECT ... FOR UPDATE) in id order.
+    user_filter is given on the user field of UserRole / UserRoleMask, e.g. user_id__in=[...].
+    """
+    User = get_user_model()
+    lookups = {}
+    for key, value in user_filter.items():
+        field, _separator, lookup = key.partition('__')
+        if field not in ('user', 'user_id'):
+            raise ValueError(f'{key} is not a lookup on the user.')
+        if field == 'user' and lookup:
+            try:
+                # user__username__startswith: a lookup on a field of the user
+                User._meta.get_field(lookup.split('__')[0])
+                lookups[lookup] = value
+                continue
+            except FieldDoesNotExist:
+                pass
+        # user, user__in, user_id__gte: lookups on the id, which take ids rather than users
+        if isinstance(value, (list, tuple, set, frozenset)):
+            value = [getattr(item, 'pk', item) for item in value]
+        lookups[f'pk__{lookup}' if lookup else 'pk'] = getattr(value, 'pk', value)
+    list(primary(User).select_for_update().filter(
+        **lookups
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def sync_role_masks(**user_filter):
+    """
+    Rewrite the role masks of the selected users from their user roles; return the number of rows.
+    Call it inside the transaction that changed the user roles. Rows are kept with a zero
+    mask when a user loses all roles, so Role.set_active can update them in place.
+    The users are locked first: concurrent rewrites of a user run one after the other and
+    each one reads the user roles committed by the previous one (no lost revocation).
+    """
+    # Import here to avoid circular imports
+    from api.models import UserRoleMask
+
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        _lock_users(**user_filter)
+        # Primary: callers may run outside a transaction (signals), where reads go to the replicas
+        masks = dict.fromkeys(
+            primary(UserRoleMask).filter(**user_filter).values_list('user_id', flat=True), 0
+        )
+        masks.update(compute_role_masks(**user_filter))
+        UserRoleMask.objects.bulk_create(
+            [UserRoleMask(user_id=user_id, mask=mask) for user_id, mask in masks.items()],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['mask', 'updated'],
+        )
+    return len(masks)
+
+
+def get_user_role_codes(user_id):
+    """
+    Return effective role codes of a user (inherited roles included), using the shared cache.
+    """
+    return _get_cached_role_codes(_get_generation(), user_id)
+
+
+def get_user_roles_version(user_id):
+    """
+    Return the current roles version of a user.
+    The version changes whenever the roles of the user (or any role) change.
+    """
+    return f'{_get_generation()}.{_get_user_version(user_id)}'
+
+
+def invalidate_user_roles(*user_ids):
+    """
+    Drop cached role codes and masks of the given users and bump their roles version.
+    """
+    generation = _get_generation()
+    cache.delete_many([
+        key
+        for user_id in user_ids
+        for key in (
+            _user_cache_key(generation, user_id),
+            _user_mask_key(generation, user_id),
+            _user_version_key(user_id),
+        )
+    ])
+
+
+def invalidate_all_roles():
+    """
+    Drop cached role codes of all users by starting a new cache generation.
+    This also makes the roles version of every user stale.
+    """
+    cache.set(ROLE_CACHE_GENERATION_KEY, time.time_ns(), None)
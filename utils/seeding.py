@@ -0,0 +1,53 @@
+# Python Standard Library
+import random
+
+# Pure Python row generation for the seed management command.
+# Nothing here imports Django, so worker processes start fast with any start method.
+
+FIRST_NAMES = (
+    'Sara', 'Ali', 'Maryam', 'Reza', 'Zahra', 'Mohammad', 'Fatemeh', 'Hossein',
+    'Narges', 'Amir', 'Arefe', 'Mehdi', 'Leila', 'Hamid', 'Niloofar', 'Kian',
+)
+LAST_NAMES = (
+    'Hamidi', 'Ahmadi', 'Karimi', 'Rezaei', 'Moradi', 'Hosseini', 'Jafari', 'Rahimi',
+    'Sadeghi', 'Ebrahimi', 'Kazemi', 'Ghasemi', 'Najafi', 'Mousavi', 'Akbari', 'Salehi',
+)
+
+# Users joined at most this many seconds before the seeding time
+JOINED_WITHIN_SECONDS = 3 * 365 * 24 * 3600
+
+
+def format_username(prefix, index):
+    """
+    Zero padded, so username order matches generation order.
+    """
+    return f'{prefix}{index:09d}'
+
+
+def generate_user_chunk(task):
+    """
+    Generate the rows of one chunk of users.
+    task is (seed, start, count, prefix, role_count, roles_per_user).
+    Returns (users, user_roles): users are (username, email, first_name, last_name,
+    joined_seconds_ago) tuples and user_roles holds the role indexes of each user.
+    Each row only depends on the seed and its index, so any chunk size and number of
+    workers produce the same rows.
+    """
+    seed, start, count, prefix, role_count, roles_per_user = task
+    rng = random.Random()
+    roles_per_user = min(roles_per_user, role_count)
+    role_indexes = range(role_count)
+
+    users, user_roles = [], []
+    for index in range(start, start + count):
+        rng.seed(f'{seed}:{index}')
+        username = format_username(prefix, index)
+        users.append((
+            username,
+            f'{username}@seed.local',
+            rng.choice(FIRST_NAMES),
+            rng.choice(LAST_NAMES),
+            rng.randrange(JOINED_WITHIN_SECONDS),
+        ))
+        user_roles.append(rng.sample(role_indexes, roles_per_user))
+    return users, user_roles
@@ -0,0 +1,210 @@
+# Python Standard Library
+import functools
+import threading
+import time
+from collections import Counter
+
+# Django Built-in modules
+from django.conf import settings
+from django.core.cache import cache
+
+# Third Party Packages
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_KEY_PREFIX = 'throttle'
+
+_RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """
+    Parse a rate like '5/min' into (num_requests, duration in seconds).
+    """
+    num, period = rate.split('/')
+    return int(num), _RATE_PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """
+    Process-local bucket store.
+    Lock-free: it relies on single dict operations being atomic, so concurrent
+    requests of one key may both be admitted (the bucket over-admits, never blocks wrongly).
+    """
+    max_entries = 100000
+
+    def __init__(self):
+        self._tats = {}
+
+    def get(self, key):
+        return self._tats.get(key)
+
+    def set(self, key, tat, timeout):
+        self._tats[key] = tat
+        if len(self._tats) > self.max_entries:
+            self._prune()
+
+    def _prune(self):
+        now = time.time()
+        for key, tat in list(self._tats.items()):
+            if tat <= now:
+                self._tats.pop(key, None)
+
+    def clear(self):
+        self._tats.clear()
+
+
+class CacheBucketStore:
+    """
+    Bucket store on the shared Django cache, so all workers share the buckets.
+    Like MemoryBucketStore, concurrent requests may over-admit slightly.
+    """
+
+    def get(self, key):
+        return cache.get(key)
+
+    def set(self, key, tat, timeout):
+        cache.set(key, tat, timeout)
+
+    def clear(self):
+        pass
+
+
+_BUCKET_STORES = {
+    'memory': MemoryBucketStore,
+    'cache': CacheBucketStore,
+}
+
+_store = None
+_blocked = Counter()
+_blocked_lock = threading.Lock()
+
+
+def get_bucket_store():
+    """
+    Return the bucket store selected by the THROTTLE_BACKEND setting.
+    """
+    global _store
+    if _store is None:
+        _store = _BUCKET_STORES[getattr(settings, 'THROTTLE_BACKEND', 'memory')]()
+    return _store
+
+
+def consume(scope, ident, now=None):
+    """
+    Take one token from the bucket of ident in the given scope.
+    Return 0 when the request is allowed, otherwise the seconds to wait.
+    The bucket is a GCRA: a single stored timestamp per key (the theoretical arrival time).
+    """
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+    if rate is None or ident is None:
+        return 0
+    num_requests, duration = parse_rate(rate)
+    interval = duration / num_requests
+    now = time.time() if now is None else now
+
+    store = get_bucket_store()
+    key = f'{THROTTLE_KEY_PREFIX}:{scope}:{ident}'
+    tat = max(store.get(key) or now, now) + interval
+    wait = tat - now - duration
+    if wait > 0:
+        with _blocked_lock:
+            _blocked[scope] += 1
+        return wait
+    store.set(key, tat, duration)
+    return 0
+
+
+def get_blocked_counts():
+    """
+    Return the number of rejected requests per scope since the process started.
+    """
+    with _blocked_lock:
+        return dict(_blocked)
+
+
+def get_client_ident(request):
+    """
+    Return the client identity used by per-IP buckets (honours NUM_PROXIES).
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def normalize_username(username):
+    """
+    Return the bucket identity of a submitted username, or None if there is none.
+    """
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return username.strip().lower()[:150]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base token bucket throttle. Subclasses set scope and implement get_bucket_ident().
+    The rate of the scope comes from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+    """
+    scope = None
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError('subclasses of TokenBucketThrottle must provide a get_bucket_ident() method')
+
+    def allow_request(self, request, view):
+        self._wait = consume(self.scope, self.get_bucket_ident(request, view))
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per client IP.
+    """
+
+    def get_bucket_ident(self, request, view):
+        return get_client_ident(request)
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per submitted username, so distributed attempts on one account are limited too.
+    """
+
+    def get_bucket_ident(self, request, view):
+        return normalize_username(request.data.get('username'))
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per authenticated user.
+    """
+
+    def get_bucket_ident(self, request, view):
+        user = request.user
+        return user.pk if user and user.is_authenticated else None
+
+
+class LoginIPThrottle(IPTokenBucketThrottle):
+    scope = 'login_ip'
+
+
+class LoginUsernameThrottle(UsernameTokenBucketThrottle):
+    scope = 'login_username'
+
+
+class RegisterIPThrottle(IPTokenBucketThrottle):
+    scope = 'register_ip'
+
+
+class TokenRefreshIPThrottle(IPTokenBucketThrottle):
+    scope = 'token_refresh_ip'
+
+
+class PasswordChangeIPThrottle(IPTokenBucketThrottle):
+    scope = 'password_change_ip'
+
+
+class PasswordChangeUserThrottle(UserTokenBucketThrottle):
+    scope = 'password_change_user'
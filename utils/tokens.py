@@ -0,0 +1,41 @@
+# Django Built-in modules
+from django.utils.translation import gettext_lazy as _
+
+# Third Party Packages
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Local Apps
+from .revocation import is_token_revoked
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh token checked against the revocation store.
+    Usage: refresh = RevocableRefreshToken.for_user(user)
+    Revoked refresh tokens (see utils/revocation.py) fail verification.
+    Access tokens carry no role claims: checking their version would cost the same cache
+    read as the role mask that permissions use (see utils/roles.py).
+    """
+
+    def verify(self):
+        """
+        Also reject revoked tokens; usually answered without a query.
+        """
+        super().verify()
+        if is_token_revoked(self):
+            raise TokenError(_('Token is blacklisted'))
+
+
+def decode_user_refresh_token(raw_token, user_id):
+    """
+    Decode a refresh token sent by a user to revoke it (logout).
+    Already revoked tokens are accepted, so logging out twice is harmless.
+    Raises TokenError if the token is invalid, expired or belongs to another user.
+    """
+    token = RefreshToken(raw_token)
+    # Older simplejwt releases store the user id claim as an int
+    if str(token.get(api_settings.USER_ID_CLAIM)) != str(user_id):
+        raise TokenError(_('Token is invalid'))
+    return token
@@ -0,0 +1,83 @@
+# Python Standard Library
+import csv
+import json
+import os
+
+# Row reading and validation for the import_users management command.
+# prepare_rows runs in worker processes started with init_worker as initializer.
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+
+def get_import_format(path, file_format=None):
+    """
+    Return the format of an input file: the given one, else its extension.
+    """
+    if file_format is not None:
+        return file_format
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return 'ndjson' if extension in ('ndjson', 'jsonl') else 'csv'
+
+
+def iter_import_rows(path, file_format):
+    """
+    Yield (row_number, row) of a CSV file with a header line or of an NDJSON file, from row 1.
+    Role codes may be a space separated string (CSV) or a list. Rows that cannot be
+    parsed are yielded as None; blank NDJSON lines are not rows.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        if file_format == 'csv':
+            rows = (
+                {key: value for key, value in row.items() if key and value is not None}
+                for row in csv.DictReader(file)
+            )
+        else:
+            rows = (_parse_json_row(line) for line in file if line.strip())
+        for row_number, row in enumerate(rows, start=1):
+            if row is not None and isinstance(row.get('roles'), str):
+                row['roles'] = row['roles'].split()
+            yield row_number, row
+
+
+def _parse_json_row(line):
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return None
+    return row if isinstance(row, dict) else None
+
+
+def init_worker():
+    """
+    Set up Django in a worker process (needed with the spawn and forkserver start methods).
+    """
+    import django
+
+    django.setup()
+
+
+def prepare_rows(rows):
+    """
+    Validate (row_number, row) pairs with UserImportSerializer and hash the passwords.
+    Returns (row_number, data, errors) triples: data has the hashed password, errors are
+    plain field -> messages. Runs no database query.
+    """
+    # Import here: Django is set up by init_worker
+    from django.contrib.auth.hashers import make_password
+    from django.utils.translation import gettext as _
+    from api.serializers import UserImportSerializer
+
+    prepared = []
+    for row_number, row in rows:
+        if row is None:
+            prepared.append((row_number, None, {'non_field_errors': [_('ردیف نامعتبر است.')]}))
+            continue
+        serializer = UserImportSerializer(data=row)
+        if not serializer.is_valid():
+            # ErrorDetail -> str, so the result pickles as plain data
+            prepared.append((row_number, None, json.loads(json.dumps(serializer.errors))))
+            continue
+        data = dict(serializer.validated_data)
+        data['password'] = make_password(data['password'])
+        prepared.append((row_number, data, None))
+    return prepared